@@ -19,13 +19,18 @@ class AI_Random(player.Player):
 	#---------------------------------------------------------------------------
 	# Constructor
 	# 
-	# Takes an id, name and bank value
+	# Takes an id, name and bank value, and optionally the random generator
+	# to make decisions with (the global random module otherwise)
 	#---------------------------------------------------------------------------
-	def __init__(self, ID, name, bank):
+	def __init__(self, ID, name, bank, rng=None):
 		
 		player.Player.__init__(self, ID, name, bank)
 		self.interface = interface	
 		
+		if rng == None:
+			rng = random
+		self.rng = rng
+		
 	#---------------------------------------------------------------------------
 	#  giveDecision()
 	# 
@@ -35,7 +40,7 @@ class AI_Random(player.Player):
 		
 		decisions = theState.decisionOptions(self.id)
 		
-		choice = random.randint(0,100)
+		choice = self.rng.randint(0,100)
 		theDecision = None
 		#Generally waiting, folding, checking or revealing should always be an option
 		for d in decisions:
@@ -196,12 +196,19 @@ class BasicInterface(interface.Interface):
 	#---------------------------------------------------------------------------
 	#	drawCard()
 	#
-	#	Draws an individual card
+	#	Draws an individual card. Cards are shared instances, so each one's
+	#	string is only built the first time and then looked up in CARD_STRINGS
 	#---------------------------------------------------------------------------
+	CARD_STRINGS = {}
+	
 	def cardString(self, theCard):
 		
 		assert theCard.isValid()
 		
+		cardStr = self.CARD_STRINGS.get(theCard)
+		if cardStr != None:
+			return cardStr
+		
 		cardStr = ""
 		
 		if theCard.suit == card.Card.HEARTS:
@@ -220,5 +227,6 @@ class BasicInterface(interface.Interface):
 		else:
 			cardStr += theCard.number
 			
+		self.CARD_STRINGS[theCard] = cardStr
 		return cardStr
 				
\ No newline at end of file
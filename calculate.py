@@ -7,8 +7,24 @@
 #	determining which moves are prudent.
 #---------------------------------------------------------------------------
 
-from math import factorial
-import card, hand, deck
+from math import factorial, sqrt
+import itertools, multiprocessing, time
+from collections import OrderedDict
+import card, hand, deck, streams
+
+#NumPy is optional, it's only needed for comparePocketsBatch() (and makes
+#estimatePockets() much quicker)
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+#SMALL_CHOOSE[n][r] = nCr for the at most 4 cards of a rank left in the deck
+SMALL_CHOOSE = [[1, 0, 0, 0, 0],
+				[1, 1, 0, 0, 0],
+				[1, 2, 1, 0, 0],
+				[1, 3, 3, 1, 0],
+				[1, 4, 6, 4, 1]]
 
 #---------------------------------------------------------------------------
 #	comparePocketsFast - This function will, compare two pockets using an
@@ -16,84 +32,159 @@ import card, hand, deck
 #	identical result to comparePockets()
 #
 #	p1, and p2 should be in the format [Card1a, Card1b], [Card2a, Card2b]
+#	optionally can pass a set of community cards to fix.
 #---------------------------------------------------------------------------
 def comparePocketsFast(p1, p2, c = []):
 	
 	#---------------------------------------------------------------------------
 	#	Algorithm description
 	#
-	#	For each level of hand rank (straight flush, four-of-a-kind, full house, etc.)
-	#	we will run a specialized algorithm that will count the number of combinations
-	#	for which p1 has the highest, for which p2 has the highest, and for which there
-	#	the community cards have the highest. These counts will be overcounts, so we must
-	#	also subtract the overlap between ranks (i.e. where p2 has a Full house, but that
-	#	combination also included p1 having 4-of-a-kind)
-	#---------------------------------------------------------------------------
-
-	# STRAIGHT FLUSHES
+	#	Instead of dealing out every board, count how many boards lead to each
+	#	result with combinatorics.
+	#
+	#	Unless somebody has a flush, a hand only depends on its ranks. So first
+	#	we go through every multiset of ranks the missing community cards could
+	#	have, work out both hands from the ranks alone (the table engine's rank
+	#	key sums) and count it as C(cards of that rank left, number drawn)
+	#	multiplied together over the ranks, the number of ways to deal it.
 	#
-	#	Algorithm description:
+	#	That miscounts the boards where somebody has a flush. For a flush in a
+	#	suit the board needs at least 3 of it, so only one suit can ever be the
+	#	flush suit. For each suit we go through every set of its ranks that could
+	#	be dealt, enough to give somebody 5 of the suit, together with every
+	#	multiset of the other suits' ranks for the rest of the board. For each
+	#	of those we know exactly who has a flush (nobody can have one in another
+	#	suit), so we move its count from the result it was given in the first
+	#	pass to the right one.
 	#
+	#	Every board is counted exactly once and scored exactly as the lookup
+	#	tables would score it, so the result is the same as comparePockets().
+	#---------------------------------------------------------------------------
 	
+	if hand.NONFLUSH_SLOTS is None:
+		hand.buildTables()
+	#hand.nonFlushScore() inlined, this is the inner loop
+	buckets = hand.NONFLUSH_BUCKETS
+	slots = hand.NONFLUSH_SLOTS
+	numBuckets = hand.NUM_BUCKETS
+	numSlots = hand.NUM_SLOTS
+	flushScores = hand.FLUSH_SCORES
+	rankKeys = hand.RANK_KEYS
 	
-	#Run for each suit
-	for suitNum in range(4):
-		if suitNum == 0:
-			suit = card.Card.HEARTS
-		elif suitNum == 1:
-			suit = card.Card.DIAMONDS
-		elif suitNum == 2:
-			suit = card.Card.SPADES
-		elif suitNum == 4:
-			suit = card.Card.CLUBS
-		else:
-			assert False
+	remaining = deck.remainingCards(p1 + p2 + c)
+	
+	assert len(remaining) == 48 - len(c)
+	
+	numDrawn = 5 - len(c)
+	
+	#Rank key sums for each player's cards so far, scaled and offset to match
+	#the table keys for 7 cards: (sum) * 8 + 7
+	baseOne = sum([rankKeys[x.rank - 2] for x in p1 + c]) * 8 + 7
+	baseTwo = sum([rankKeys[x.rank - 2] for x in p2 + c]) * 8 + 7
+	
+	available = [0] * 15
+	for x in remaining:
+		available[x.rank] += 1
+	
+	results = [0, 0, 0]
+	
+	#Every board as if nobody could have a flush
+	for keySum, ways in rankDraws(available, numDrawn):
+		keyOne = baseOne + keySum * 8
+		keyTwo = baseTwo + keySum * 8
+		results[outcome(slots[(keyOne + buckets[keyOne % numBuckets]) % numSlots],
+						slots[(keyTwo + buckets[keyTwo % numBuckets]) % numSlots])] += ways
+	
+	#Now fix the boards where someone does
+	for suit in range(4):
 		
-		#The low card goes from A to 10
-		for lowWindow in range(11):
-			# Count the number of cards owned by p1, p2 and the community cards to count the contribution of this window
-			# to the w/t/l count
-			p1Cards = 0
-			p2Cards = 0
-			cCards = 0
-			overcard = -1 #-1 = deck, 0 = c, 1 = p1, 2 = p2
-			
-			#the window is the next five cards after the low card. Also go one card further to check who holds the overcard
-			for window in range(lowWindow, lowWindow+6):
-				if ((p1[0].suit == suit and p1[0].getRank() == window) or
-					(p1[1].suit == suit and p1[1].getRank() == window)):
-					if window == lowWindow+5:
-						overcard = 1
-					else:
-						p1cards += 1
-				elif ((p2[0].suit == suit and p2[0].getRank() == window) or
-					 (p2[1].suit == suit and p2[1].getRank() == window)):
-					if window == lowWindow+5:
-						overcard = 2
-					else:
-						p1cards += 1	
-				for ccard in c:
-					if ccard.suit == suit and ccard.getRank() == window:
-						if window == lowWindow+5:
-							overcard = 0
-						else:
-							cCards += 1
-						break
+		suitedLeft = [x.rank for x in remaining if x.suitIndex == suit]
+		countOne = len([x for x in p1 + c if x.suitIndex == suit])
+		countTwo = len([x for x in p2 + c if x.suitIndex == suit])
+		
+		#How many more of the suit it takes for somebody to get to 5
+		needed = max(5 - max(countOne, countTwo), 0)
+		if needed > min(numDrawn, len(suitedLeft)):
+			continue
 			
-							
+		maskOne = 0
+		for x in p1 + c:
+			if x.suitIndex == suit:
+				maskOne |= 1 << (x.rank - 2)
+		maskTwo = 0
+		for x in p2 + c:
+			if x.suitIndex == suit:
+				maskTwo |= 1 << (x.rank - 2)
+		
+		#The rest of the board comes from the other suits
+		otherAvailable = available[:]
+		for r in suitedLeft:
+			otherAvailable[r] -= 1
+		otherDraws = [list(rankDraws(otherAvailable, n)) for n in range(numDrawn + 1)]
+		
+		for numSuited in range(needed, min(numDrawn, len(suitedLeft)) + 1):
+			hasFlushOne = countOne + numSuited >= 5
+			hasFlushTwo = countTwo + numSuited >= 5
 			
-			# both players held cards in this window then the SF is impossible
-			if (p1Cards == 0 or p2cards == 0)
+			for suitedRanks in itertools.combinations(suitedLeft, numSuited):
+				suitedKeys = 0
+				suitedMask = 0
+				for r in suitedRanks:
+					suitedKeys += rankKeys[r - 2]
+					suitedMask |= 1 << (r - 2)
 				
-			
+				flushOne = flushScores[maskOne | suitedMask]
+				flushTwo = flushScores[maskTwo | suitedMask]
 				
-			
-			
-		
-		
-
-	pass
+				for keySum, ways in otherDraws[numDrawn - numSuited]:
+					keySum = (keySum + suitedKeys) * 8
+					keyOne = baseOne + keySum
+					keyTwo = baseTwo + keySum
+					plainOne = slots[(keyOne + buckets[keyOne % numBuckets]) % numSlots]
+					plainTwo = slots[(keyTwo + buckets[keyTwo % numBuckets]) % numSlots]
+					
+					before = outcome(plainOne, plainTwo)
+					after = outcome(flushOne if hasFlushOne else plainOne, flushTwo if hasFlushTwo else plainTwo)
+					if before != after:
+						results[before] -= ways
+						results[after] += ways
+	
+	return tuple(results)
+	
+#---------------------------------------------------------------------------
+#	rankDraws(available, numDrawn)
+#
+#	Generates every multiset of numDrawn ranks that can be drawn when there
+#	are available[r] cards of rank r left, as (sum of the ranks' keys, number
+#	of ways to draw it)
+#---------------------------------------------------------------------------
+def rankDraws(available, numDrawn, lowest = 2):
+	
+	if numDrawn == 0:
+		yield (0, 1)
+		return
+	
+	for r in range(lowest, 15):
+		for n in range(1, min(available[r], numDrawn) + 1):
+			key = hand.RANK_KEYS[r - 2] * n
+			ways = SMALL_CHOOSE[available[r]][n]
+			for keySum, moreWays in rankDraws(available, numDrawn - n, r + 1):
+				yield (key + keySum, ways * moreWays)
+				
+#---------------------------------------------------------------------------
+#	outcome(scoreOne, scoreTwo)
+#
+#	0, 1 or 2 for a win, tie or loss of the first score, the index used in
+#	the (wins, ties, losses) results
+#---------------------------------------------------------------------------
+def outcome(scoreOne, scoreTwo):
 	
+	if scoreOne > scoreTwo:
+		return 0
+	elif scoreOne == scoreTwo:
+		return 1
+	
+	return 2
 	
 #---------------------------------------------------------------------------
 #	comparePockets - This function will, through brute force compare the 
@@ -106,78 +197,463 @@ def comparePocketsFast(p1, p2, c = []):
 #	If analysis is true, instead of storing wins, ties and losses, comparePockets
 #	will give a table of hand evaluation ranks (i.e. # of times A had a SF while 
 #	B had a FH) which will be useful for debugging comparePocketsFast()
+#
+#	With workers > 1 the boards are split up by their first card into
+#	contiguous ranges which are counted in that many processes and added
+#	together at the end. The result is the same as counting them in one go,
+#	workers = None uses every core
+#---------------------------------------------------------------------------
+def comparePockets(p1, p2, c = [], analysis = False, workers = 1):
+	
+	remaining = deck.remainingCards(p1 + p2 + c)
+		
+	assert len(remaining) == 48 - len(c)
+	
+	if workers == None:
+		workers = multiprocessing.cpu_count()
+	
+	numLeft = 5 - len(c)
+	if workers > 1 and numLeft > 0:
+		
+		#A few shards per worker so one that finishes early can pick up more
+		shards = shardRanges(len(remaining), numLeft, workers * 4)
+		ids = ([x.id for x in p1], [x.id for x in p2], [x.id for x in c])
+		
+		pool = multiprocessing.Pool(workers)
+		try:
+			shardResults = pool.map(compareShard, [ids + (first, last, analysis) for first, last in shards])
+		finally:
+			pool.close()
+			pool.join()
+		
+		results, aTable = mergeShards(shardResults, analysis)
+		
+	else:
+		results, aTable = compareShard(([x.id for x in p1], [x.id for x in p2], [x.id for x in c], None, None, analysis))
+			
+	if analysis:
+		return aTable
+		
+	return tuple(results)
+	
+#---------------------------------------------------------------------------
+#	compareShard((p1, p2, c, first, last, analysis))
+#
+#	Counts the boards of comparePockets() whose first card is remaining[first]
+#	up to remaining[last - 1] (or all of them if first is None), returning
+#	([wins, ties, losses], aTable). The cards are passed as ids and it takes
+#	a single tuple so it can be handed to a process pool
+#---------------------------------------------------------------------------
+def compareShard(args):
+	
+	p1, p2, c, first, last, analysis = args
+	p1, p2, c = [[card.fromID(i) for i in group] for group in (p1, p2, c)]
+	
+	remaining = deck.remainingCards(p1 + p2 + c)
+	numLeft = 5 - len(c)
+	
+	aTable = None
+	if analysis:
+		aTable = analysisTable()
+	
+	#Each board is built up a card at a time from hand states for the pockets and the
+	#fixed community cards, so boards with the same first cards share their work
+	results = [0, 0, 0]
+	stateOne = hand.HandState(p1 + c)
+	stateTwo = hand.HandState(p2 + c)
+	if first == None:
+		compareRunouts(stateOne, stateTwo, remaining, 0, numLeft, results, aTable)
+	else:
+		for i in range(first, last):
+			x = remaining[i]
+			compareRunouts(stateOne.add(x), stateTwo.add(x), remaining, i + 1, numLeft - 1, results, aTable)
+	
+	return results, aTable
+	
+#---------------------------------------------------------------------------
+#	shardRanges(numCards, numLeft, numShards)
+#
+#	Splits the possible first cards of a numLeft card runout from numCards
+#	cards into at most numShards contiguous (first, last) index ranges with
+#	about the same number of boards in each
+#---------------------------------------------------------------------------
+def shardRanges(numCards, numLeft, numShards):
+	
+	#Number of boards starting with each card
+	counts = [choose(numCards - 1 - i, numLeft - 1) for i in range(numCards - numLeft + 1)]
+	target = float(sum(counts)) / numShards
+	
+	shards = []
+	first = 0
+	total = 0
+	for i in range(len(counts)):
+		total += counts[i]
+		if total >= target * (len(shards) + 1) or i == len(counts) - 1:
+			shards.append((first, i + 1))
+			first = i + 1
+	
+	return shards
+	
+#---------------------------------------------------------------------------
+#	mergeShards(shardResults, analysis)
+#
+#	Adds up the ([wins, ties, losses], aTable) results of compareShard()
 #---------------------------------------------------------------------------
-def comparePockets(p1, p2, c = [], analysis = False):
+def mergeShards(shardResults, analysis):
 	
-	d = deck.Deck()
-	d.pull(p1[0].suit, p1[0].number)
-	d.pull(p1[1].suit, p1[1].number)
-	d.pull(p2[0].suit, p2[0].number)
-	d.pull(p2[1].suit, p2[1].number)
-	for ci in c:
-		d.pull(ci.suit, ci.number)
+	results = [0, 0, 0]
+	aTable = None
+	if analysis:
+		aTable = analysisTable()
+	
+	for shard, shardTable in shardResults:
+		for m in range(3):
+			results[m] += shard[m]
+		if analysis:
+			for i in range(9):
+				for l in range(9):
+					for m in range(3):
+						aTable[i][l][m] += shardTable[i][l][m]
+	
+	return results, aTable
+	
+#---------------------------------------------------------------------------
+#	analysisTable()
+#
+#	Returns an empty table for comparePockets(analysis = True)
+#---------------------------------------------------------------------------
+def analysisTable():
+	
+	#Table is indexed by A's hand evaluations with an array storing counts of B's hand evalutations
+	aTable = {}
+	for i in range(9):
+		aTable[i] = {}
+		for l in range(9):
+			aTable[i][l] = {}
+			#Store win/tie/loss
+			for m in range(3):
+				aTable[i][l][m] = 0
+	
+	return aTable
+	
+#---------------------------------------------------------------------------
+#	compareRunouts(stateOne, stateTwo, remaining, start, numLeft, results, aTable)
+#
+#	Deals every combination of numLeft more cards from remaining[start:] to
+#	both hand states, adding 1 to results[0], [1] or [2] for each win, tie
+#	or loss of the first hand. If given, aTable is filled in the same way as
+#	comparePockets() does for analysis
+#---------------------------------------------------------------------------
+def compareRunouts(stateOne, stateTwo, remaining, start, numLeft, results, aTable = None):
+	
+	if numLeft == 0:
+		scores = [(stateOne.score(), stateTwo.score())]
+	
+	elif numLeft == 1:
+		#Last card, score without building any more states
+		scores = [(stateOne.scoreWith(x), stateTwo.scoreWith(x)) for x in remaining[start:]]
+		
+	else:
+		for i in range(start, len(remaining) - numLeft + 1):
+			x = remaining[i]
+			compareRunouts(stateOne.add(x), stateTwo.add(x), remaining, i + 1, numLeft - 1, results, aTable)
+		return
+	
+	for scoreOne, scoreTwo in scores:
+		result = outcome(scoreOne, scoreTwo)
 		
-	assert len(d.cards) == 48 - len(c)
+		results[result] += 1
+		if aTable != None:
+			aTable[hand.scoreCategory(scoreOne)][hand.scoreCategory(scoreTwo)][result] += 1
+	
+#---------------------------------------------------------------------------
+#	comparePocketsBatch - Gives the same (wins, ties, losses) as comparePockets()
+#	but scores chunkSize boards at a time with hand.scoreBatch() instead of
+#	evaluating every board in Python. Needs NumPy
+#---------------------------------------------------------------------------
+def comparePocketsBatch(p1, p2, c = [], chunkSize = 200000):
+	
+	assert numpy != None, "comparePocketsBatch() requires NumPy"
+	
+	remaining = deck.remainingCards(p1 + p2 + c)
+	
+	assert len(remaining) == 48 - len(c)
+	
+	remainingIDs = numpy.array([x.id for x in remaining], dtype = numpy.uint8)
+	fixedOne = numpy.array([x.id for x in p1 + c], dtype = numpy.uint8)
+	fixedTwo = numpy.array([x.id for x in p2 + c], dtype = numpy.uint8)
+	combos = combinationIndices(len(remaining), 5 - len(c))
 	
-	seq = [4, 3, 2, 1, 0]
-	seq = seq[len(c):]
-	numSeq = 1
 	wins = 0
 	ties = 0
 	losses = 0
+	for start in range(0, len(combos), chunkSize):
+		
+		boards = remainingIDs[combos[start:start + chunkSize]]
+		scoresOne = hand.scoreBatch(numpy.hstack([numpy.tile(fixedOne, (len(boards), 1)), boards]))
+		scoresTwo = hand.scoreBatch(numpy.hstack([numpy.tile(fixedTwo, (len(boards), 1)), boards]))
+		
+		wins += int((scoresOne > scoresTwo).sum())
+		ties += int((scoresOne == scoresTwo).sum())
+		losses += int((scoresOne < scoresTwo).sum())
 	
-	if analysis:
-		#Table is indexed by A's hand evaluations with an array storing counts of B's hand evalutations
-		aTable = {}
-		for i in range(9):
-			aTable[i] = {}
-			for l in range(9):
-				aTable[i][l] = {}
-				#Store win/tie/loss
-				for m in range(3):
-					aTable[i][l][m] = 0
+	return (wins, ties, losses)
+	
+#---------------------------------------------------------------------------
+#	comparePocketsCached - Gives the same (wins, ties, losses) as comparePockets()
+#	but remembers results in equityCache. Situations that are the same up to
+#	a relabelling of the suits (see card.canonicalize()) share one entry, so
+#	each is only worked out once, with comparePocketsFast()
+#
+#	Once EQUITY_CACHE_SIZE situations are remembered the least recently used
+#	one is forgotten for each new one. The default holds every preflop
+#	matchup, there are far too many after the flop to keep them all
+#---------------------------------------------------------------------------
+EQUITY_CACHE_SIZE = 100000
+equityCache = OrderedDict()
+
+def comparePocketsCached(p1, p2, c = []):
+	
+	key = card.canonicalize([p1, p2, c])
+	
+	#Taken out and put back so it's the most recently used
+	results = equityCache.pop(key, None)
+	if results == None:
+		p1, p2, c = [[card.fromID(i) for i in group] for group in key]
+		results = comparePocketsFast(p1, p2, c)
 		
-	handOne = hand.Hand([], 1)
-	handTwo = hand.Hand([], 2)
+		while len(equityCache) >= EQUITY_CACHE_SIZE:
+			equityCache.popitem(last = False)
+			
+	equityCache[key] = results
+	return results
+	
+#---------------------------------------------------------------------------
+#	estimatePockets - Estimates the equity of p1 against p2 (the share of the
+#	pot it wins on average, ties counting half) by dealing random runouts
+#	instead of all of them, for when an answer is needed quickly rather than
+#	exactly. Takes the same pockets and community cards as comparePockets().
+#
+#	Runouts are dealt batchSize at a time until the standard error of the
+#	estimate is down to precision, or timeLimit seconds have gone by, or
+#	maxSamples runouts have been dealt, whichever comes first. If there are
+#	at most exactLimit possible runouts (every flop and turn by default) the
+#	exact answer is worked out with comparePocketsFast() instead, which only
+#	takes a millisecond or so for those.
+#
+#	Returns (equity, standard error, (wins, ties, losses)), the counts being
+#	of the runouts dealt. The same seed always gives the same answer (unless
+#	timeLimit stops it at a different point).
+#---------------------------------------------------------------------------
+def estimatePockets(p1, p2, c = [], exactLimit = 2000, precision = 0.005, timeLimit = None, maxSamples = None,
+					seed = None, batchSize = None):
+	
+	startTime = time.time()
+	
+	remaining = deck.remainingCards(p1 + p2 + c)
+	
+	assert len(remaining) == 48 - len(c)
+	assert precision > 0 or timeLimit != None or maxSamples != None
+	
+	numDrawn = 5 - len(c)
+	
+	if batchSize == None:
+		#Without NumPy every runout is scored in Python, so check the time more often
+		batchSize = 1000 if numpy != None else 100
+	
+	if choose(len(remaining), numDrawn) <= exactLimit:
+		results = comparePocketsFast(p1, p2, c)
+		return ((results[0] + results[1] / 2.0) / sum(results), 0.0, results)
+	
+	rngs = streams.RNGStreams(seed)
+	if numpy != None:
+		rng = rngs.numpyStream("estimatePockets")
+		fixedOne = numpy.array([x.id for x in p1 + c], dtype = numpy.uint8)
+		fixedTwo = numpy.array([x.id for x in p2 + c], dtype = numpy.uint8)
+	else:
+		rng = rngs.stream("estimatePockets")
+		stateOne = hand.HandState(p1 + c)
+		stateTwo = hand.HandState(p2 + c)
+	
+	#Wins, ties and losses so far
+	counts = [0, 0, 0]
 	while True:
 		
-		communityCards = getComboFromSequence(seq, d.cards) + c
-		handOne.cards = p1 + communityCards
-		handTwo.cards = p2 + communityCards
+		if numpy != None:
+			boards = deck.shuffledDecks(batchSize, numDrawn, p1 + p2 + c, rng)
+			scoresOne = hand.scoreBatch(numpy.hstack([numpy.tile(fixedOne, (batchSize, 1)), boards]))
+			scoresTwo = hand.scoreBatch(numpy.hstack([numpy.tile(fixedTwo, (batchSize, 1)), boards]))
+			
+			counts[0] += int((scoresOne > scoresTwo).sum())
+			counts[1] += int((scoresOne == scoresTwo).sum())
+			counts[2] += int((scoresOne < scoresTwo).sum())
+			
+		else:
+			for i in range(batchSize):
+				board = rng.sample(remaining, numDrawn)
+				scoreOne = stateOne.addAll(board).score()
+				scoreTwo = stateTwo.addAll(board).score()
+				
+				counts[outcome(scoreOne, scoreTwo)] += 1
 		
-		if analysis:
-			aRank = handOne.evaluate()[0]
-			bRank = handTwo.evaluate()[0]
+		#Each runout is worth 1, 1/2 or 0 of the pot
+		wins, ties, losses = counts
+		numSamples = wins + ties + losses
+		equity = (wins + ties / 2.0) / numSamples
+		variance = max((wins + ties / 4.0) / numSamples - equity * equity, 0.0)
+		standardError = sqrt(variance / numSamples)
 		
-		winners = hand.winner([handOne, handTwo])
-		if len(winners) == 1:
-			if winners[0] == 1:
-				wins += 1
-				if analysis:
-					aTable[aRank][bRank][0] += 1
-			else:
-				losses += 1
-				if analysis:
-					aTable[aRank][bRank][2] += 1
+		if standardError <= precision:
+			break
+		if timeLimit != None and time.time() - startTime >= timeLimit:
+			break
+		if maxSamples != None and numSamples >= maxSamples:
+			break
+	
+	return (equity, standardError, (wins, ties, losses))
+	
+#---------------------------------------------------------------------------
+#	comparePocketsMultiway - Works out how any number of pockets do against
+#	each other, optionally with some community cards fixed, e.g. everyone
+#	left in an all-in. Returns (players, standard error) where players has a
+#	(win, tie, equity) for each pocket: the share of runouts it wins outright,
+#	the share it splits, and the share of the pot it gets on average.
+#
+#	If there are at most exactLimit possible runouts, every one of them is
+#	dealt and the standard error is 0. Otherwise random runouts are dealt
+#	the same way as estimatePockets() does, until the largest standard error
+#	of the players' equities is down to precision, timeLimit seconds have
+#	gone by or maxSamples runouts have been dealt.
+#---------------------------------------------------------------------------
+def comparePocketsMultiway(pockets, c = [], exactLimit = None, precision = 0.005, timeLimit = None,
+						   maxSamples = None, seed = None, batchSize = None):
+	
+	startTime = time.time()
+	
+	dead = c[:]
+	for pocket in pockets:
+		dead += pocket
+	remaining = deck.remainingCards(dead)
+	
+	assert len(pockets) >= 2
+	assert len(remaining) == 52 - len(dead), "The same card is in more than one place"
+	
+	numDrawn = 5 - len(c)
+	
+	#Without NumPy every runout goes through a showdown in Python, so there
+	#are fewer of them to a batch and it takes longer to deal all of them
+	if exactLimit == None:
+		exactLimit = 200000 if numpy != None else 5000
+	if batchSize == None:
+		batchSize = 1000 if numpy != None else 100
+	
+	#wins, ties, pot shares and squared pot shares for each player
+	totals = [[0] * len(pockets), [0] * len(pockets), [0.0] * len(pockets), [0.0] * len(pockets)]
+	
+	if choose(len(remaining), numDrawn) <= exactLimit:
+		if numpy != None:
+			remainingIDs = numpy.array([x.id for x in remaining], dtype = numpy.uint8)
+			combos = combinationIndices(len(remaining), numDrawn)
+			for start in range(0, len(combos), batchSize * 10):
+				tallyShowdowns(pockets, c, remainingIDs[combos[start:start + batchSize * 10]], totals)
 		else:
-			ties += 1
-			if analysis:
-				aTable[aRank][bRank][1] += 1
+			tallyShowdowns(pockets, c, itertools.combinations(remaining, numDrawn), totals)
 		
-		seq = getNextCombinationSequence(seq, d.cards)
-		numSeq += 1
+		numSamples = choose(len(remaining), numDrawn)
+		return ([(totals[0][i] / float(numSamples), totals[1][i] / float(numSamples), totals[2][i] / numSamples)
+				 for i in range(len(pockets))], 0.0)
+	
+	assert precision > 0 or timeLimit != None or maxSamples != None
+	
+	rngs = streams.RNGStreams(seed)
+	if numpy != None:
+		rng = rngs.numpyStream("comparePocketsMultiway")
+	else:
+		rng = rngs.stream("comparePocketsMultiway")
+	
+	numSamples = 0
+	while True:
 		
-		if numSeq > 100000:
-			numSeq = 0
-			print "Another 100000 combinations tested."
+		if numpy != None:
+			tallyShowdowns(pockets, c, deck.shuffledDecks(batchSize, numDrawn, dead, rng), totals)
+		else:
+			tallyShowdowns(pockets, c, [rng.sample(remaining, numDrawn) for i in range(batchSize)], totals)
+		numSamples += batchSize
 		
-		if not seq:
-			break 
-			
-	if analysis:
-		return aTable
+		standardError = 0.0
+		for i in range(len(pockets)):
+			equity = totals[2][i] / numSamples
+			variance = max(totals[3][i] / numSamples - equity * equity, 0.0)
+			standardError = max(standardError, sqrt(variance / numSamples))
 		
-	return (wins, ties, losses)
+		if standardError <= precision:
+			break
+		if timeLimit != None and time.time() - startTime >= timeLimit:
+			break
+		if maxSamples != None and numSamples >= maxSamples:
+			break
+	
+	return ([(totals[0][i] / float(numSamples), totals[1][i] / float(numSamples), totals[2][i] / numSamples)
+			 for i in range(len(pockets))], standardError)
+	
+#---------------------------------------------------------------------------
+#	tallyShowdowns(pockets, c, boards, totals)
+#
+#	Adds the results of the pockets' showdowns on each of the boards (the
+#	cards dealt to the community cards c) to the wins, ties, pot shares and
+#	squared pot shares in totals. boards is an array of card ids if NumPy is
+#	there, otherwise lists of cards
+#---------------------------------------------------------------------------
+def tallyShowdowns(pockets, c, boards, totals):
+	
+	wins, ties, shares, squares = totals
+	
+	if numpy != None:
+		#Score everyone on every board at once
+		scores = numpy.array([hand.scoreBatch(numpy.hstack([numpy.tile(numpy.array([x.id for x in pocket + c], dtype = numpy.uint8),
+																		  (len(boards), 1)), boards]))
+							  for pocket in pockets])
+		winners = scores == scores.max(axis = 0)
+		numWinners = winners.sum(axis = 0)
+		share = winners / numWinners.astype(float)
+		
+		for i in range(len(pockets)):
+			wins[i] += int((winners[i] & (numWinners == 1)).sum())
+			ties[i] += int((winners[i] & (numWinners > 1)).sum())
+			shares[i] += float(share[i].sum())
+			squares[i] += float((share[i] * share[i]).sum())
+		
+	else:
+		for board in boards:
+			winnerIDs = hand.showdown(c + list(board), pockets)[0]
+			
+			share = 1.0 / len(winnerIDs)
+			for i in winnerIDs:
+				if len(winnerIDs) == 1:
+					wins[i] += 1
+				else:
+					ties[i] += 1
+				shares[i] += share
+				squares[i] += share * share
+	
+#---------------------------------------------------------------------------
+#	combinationIndices(n, k)
+#
+#	Returns a (choose(n, k), k) NumPy array of every k-combination of the
+#	indices 0 to n-1, in the same order as itertools.combinations. These get
+#	reused for every pocket comparison so they're cached
+#---------------------------------------------------------------------------
+combinationCache = {}
+
+def combinationIndices(n, k):
+	
+	if not (n, k) in combinationCache:
+		numCombos = choose(n, k)
+		flat = numpy.fromiter(itertools.chain.from_iterable(itertools.combinations(range(n), k)),
+							  dtype = numpy.uint8, count = numCombos * k)
+		combinationCache[(n, k)] = flat.reshape(numCombos, k)
+	
+	return combinationCache[(n, k)]
 	
 #---------------------------------------------------------------------------
 #	getNextCombinationSequence(seq, l)
@@ -305,6 +781,119 @@ def printAnalysis(wins=True, ties=True, losses=True, total=False):
 
 if __name__ == "__main__":
 	
+	print "Testing comparePocketsFast."
+	
+	#It has to agree exactly with the brute force count
+	for pockets, board in [("AhAd KcKs", ""), ("AhKh QhJh", "2h"), ("2h3h 4h5h", "6s7sTh"),
+						   ("AhKh QhJh", "2h3h4h"), ("QsJs Tc9c", "2h5h9d4d"), ("7c7d 8s8d", "7h8c2c")]:
+		ids = card.parseCards(pockets + board)
+		cards = [card.fromID(i) for i in ids]
+		assert comparePocketsFast(cards[:2], cards[2:4], cards[4:]) == comparePockets(cards[:2], cards[2:4], cards[4:])
+	
+	print "Test complete."
+	
+	print "Testing comparePocketsCached."
+	
+	cards = [card.fromID(i) for i in card.parseCards("AhKh 7c7d 2h5h9c")]
+	assert comparePocketsCached(cards[:2], cards[2:4], cards[4:]) == (545, 0, 445)
+	
+	#Relabelling the suits finds the same entry
+	swapped = [card.fromID(i) for i in card.parseCards("AsKs 7c7d 2s5s9c")]
+	assert comparePocketsCached(swapped[:2], swapped[2:4], swapped[4:]) == (545, 0, 445)
+	assert len(equityCache) == 1
+	
+	#The cache never grows past its size, and forgets the least recently used first
+	oldSize = EQUITY_CACHE_SIZE
+	EQUITY_CACHE_SIZE = 3
+	turns = [[card.fromID(i) for i in card.parseCards("AhKh 7c7d 2h5h9c" + turn)] for turn in ["Td", "Jd", "Qd", "3c"]]
+	for turn in turns[:3]:
+		comparePocketsCached(turn[:2], turn[2:4], turn[4:])
+	comparePocketsCached(turns[1][:2], turns[1][2:4], turns[1][4:])
+	comparePocketsCached(turns[3][:2], turns[3][2:4], turns[3][4:])
+	assert len(equityCache) == 3
+	assert card.canonicalize([turns[0][:2], turns[0][2:4], turns[0][4:]]) not in equityCache
+	assert card.canonicalize([turns[1][:2], turns[1][2:4], turns[1][4:]]) in equityCache
+	EQUITY_CACHE_SIZE = oldSize
+	equityCache.clear()
+	
+	print "Test complete."
+	
+	print "Testing estimatePockets."
+	
+	p1 = [card.fromID(i) for i in card.parseCards("AhKh")]
+	p2 = [card.fromID(i) for i in card.parseCards("7c7d")]
+	wins, ties, losses = comparePocketsFast(p1, p2)
+	exact = (wins + ties / 2.0) / (wins + ties + losses)
+	
+	equity, standardError, counts = estimatePockets(p1, p2, precision = 0.002, seed = 1)
+	assert standardError <= 0.002
+	assert abs(equity - exact) < 5 * standardError
+	assert estimatePockets(p1, p2, precision = 0.002, seed = 1) == (equity, standardError, counts)
+	
+	#Stops on time or number of samples too
+	start = time.time()
+	equity, standardError, counts = estimatePockets(p1, p2, precision = 0, timeLimit = 0.005)
+	assert time.time() - start < 0.1
+	assert sum(estimatePockets(p1, p2, precision = 0, maxSamples = 2000, batchSize = 500)[2]) == 2000
+	
+	#Few enough runouts are counted exactly
+	board = [card.fromID(i) for i in card.parseCards("2h5h9c")]
+	assert estimatePockets(p1, p2, board) == (1090 / 1980.0, 0.0, (545, 0, 445))
+	assert estimatePockets(p1, p2, board, exactLimit = 0, precision = 0.05, seed = 1)[1] > 0
+	
+	print "Test complete."
+	
+	print "Testing comparePocketsMultiway."
+	
+	#Heads up it has to agree with comparePockets()
+	cards = [card.fromID(i) for i in card.parseCards("AhKh 7c7d 2h5h9c")]
+	players, standardError = comparePocketsMultiway([cards[:2], cards[2:4]], cards[4:])
+	assert standardError == 0.0
+	assert players[0] == (545 / 990.0, 0.0, 545 / 990.0)
+	assert players[1] == (445 / 990.0, 0.0, 445 / 990.0)
+	
+	#A three way split on the board
+	cards = [card.fromID(i) for i in card.parseCards("2c3c 2d3d 2h3h AsKsQsJsTs")]
+	players, standardError = comparePocketsMultiway([cards[:2], cards[2:4], cards[4:6]], cards[6:])
+	for win, tie, equity in players:
+		assert win == 0.0 and tie == 1.0 and abs(equity - 1 / 3.0) < 1e-12
+	
+	#Preflop is sampled, the equities always add up to the whole pot
+	pockets = [[card.fromID(i) for i in card.parseCards(p)] for p in ["AhAd", "KcKs", "8h9h", "2c7d"]]
+	players, standardError = comparePocketsMultiway(pockets, precision = 0.01, seed = 1)
+	assert 0 < standardError <= 0.01
+	assert abs(sum([equity for win, tie, equity in players]) - 1) < 1e-9
+	assert players[0][2] > players[1][2] > players[3][2]
+	assert comparePocketsMultiway(pockets, precision = 0.01, seed = 1) == (players, standardError)
+	
+	#Sampling and exact counting agree
+	board = [card.fromID(i) for i in card.parseCards("Th9d2s")]
+	exact = comparePocketsMultiway(pockets, board)[0]
+	sampled, standardError = comparePocketsMultiway(pockets, board, exactLimit = 0, precision = 0.003, seed = 2)
+	for i in range(len(pockets)):
+		assert abs(exact[i][2] - sampled[i][2]) < 5 * standardError
+	
+	print "Test complete."
+	
+	print "Testing parallel comparePockets."
+	
+	#Splitting the boards over processes mustn't change the counts
+	for pockets, board in [("AhKh QhJh", "2h"), ("7c7d 8s8d", "7h8c2c"), ("QsJs Tc9c", "2h5h9d4d")]:
+		ids = card.parseCards(pockets + board)
+		cards = [card.fromID(i) for i in ids]
+		assert comparePockets(cards[:2], cards[2:4], cards[4:], workers = 3) == comparePockets(cards[:2], cards[2:4], cards[4:])
+		assert comparePockets(cards[:2], cards[2:4], cards[4:], analysis = True, workers = 2) == comparePockets(cards[:2], cards[2:4], cards[4:], analysis = True)
+	
+	for numCards, numLeft in [(48, 5), (45, 2), (44, 1), (10, 5)]:
+		for numShards in [1, 3, 32, 100]:
+			shards = shardRanges(numCards, numLeft, numShards)
+			assert shards[0][0] == 0 and shards[-1][1] == numCards - numLeft + 1
+			assert len(shards) <= numShards
+			for i in range(1, len(shards)):
+				assert shards[i][0] == shards[i - 1][1]
+	
+	print "Test complete."
+	
 	p1 = [card.Card("H", "A"), card.Card("D", "2")]
 	p2 = [card.Card("C", "K"), card.Card("C", "Q")]
 	c = []
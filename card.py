@@ -7,15 +7,25 @@
 #	(hearts, clubs, diamonds, spades) and a number (2-10,J,Q, K,A). Also includes
 #   basic functions for comparing cards.
 #
+#	Cards are encoded as integer ids (0-51) so that rank and suit can be
+#	recovered by table lookup rather than string comparison.
+#
 #---------------------------------------------------------------------------
 
+import itertools
 
 #---------------------------------------------------------------------------
 #	Card class
 #	
 #	Contains a suit, number and various comparison functions
+#
+#	Cards are immutable and interned: there is exactly one Card object for
+#	each suit and number, so two cards are equal only if they are the same
+#	object and comparisons are identity checks.
 #---------------------------------------------------------------------------
-class Card:
+class Card(object):
+	
+	__slots__ = ("id", "rank", "suitIndex", "suit", "number")
 	
 	DIAMONDS = "diamonds"
 	HEARTS = "hearts"
@@ -25,59 +35,64 @@ class Card:
 	#---------------------------------------------------------------------------
 	#	Constructor
 	#
-	#	Takes two strings, a suit and a number and creates the corresponding
+	#	Takes two strings, a suit and a number and returns the corresponding
 	#	card. If either suit or number are ill-defined, the card will be undefined
+	#
+	#	Internally the card is stored as an integer id (see cardID()) together
+	#	with its numeric rank and suit index, the strings are kept for display.
+	#	The card is looked up in the interned table rather than built anew.
 	#---------------------------------------------------------------------------
-	def __init__(self, newSuit, newNumber):	
-		
-		newNumber = newNumber.upper()
-		
-		if newNumber == "2":
-			self.number = "2"
-		elif newNumber == "3":
-			self.number = "3"
-		elif newNumber == "4":
-			self.number = "4"
-		elif newNumber == "5":
-			self.number = "5"
-		elif newNumber == "6":
-			self.number = "6"
-		elif newNumber == "7":
-			self.number = "7"
-		elif newNumber == "8":
-			self.number = "8"
-		elif newNumber == "9":
-			self.number = "9"
-		elif newNumber == "10":
-			self.number = "10"
-		elif newNumber == "J" or newNumber == "JACK":
-			self.number = "J"
-		elif newNumber == "Q" or newNumber == "QUEEN":
-			self.number = "Q"
-		elif newNumber == "K" or newNumber == "KING":
-			self.number = "K"	
-		elif newNumber == "A" or newNumber == "ACE" or newNumber == "1":
-			self.number = "A"
-		elif newNumber == "UNKNOWN" or newNumber == "?":
-			self.number = "unknown"
-		else:
-			self.number = "undefined"
-			
-		newSuit = newSuit.lower()
-
-		if newSuit == "hearts" or newSuit == "h":
-			self.suit = self.HEARTS
-		elif newSuit == "diamonds" or newSuit == "d":
-			self.suit = self.DIAMONDS
-		elif newSuit == "clubs" or newSuit == "c":
-			self.suit = self.CLUBS
-		elif newSuit == "spades" or newSuit == "s":
-			self.suit = self.SPADES
-		elif newSuit == "unknown" or newSuit == "?":
-			self.suit = "unknown"
+	def __new__(cls, newSuit, newNumber):
+		
+		rank = NUMBER_RANKS.get(newNumber.upper(), UNDEFINED)
+		suitIndex = SUIT_INDICES.get(newSuit.lower(), UNDEFINED)
+		
+		return INTERNED[(suitIndex, rank)]
+		
+	#---------------------------------------------------------------------------
+	#	make()
+	#
+	#	Builds the single shared instance for a suit index and rank code. Only
+	#	used while filling the interned table.
+	#---------------------------------------------------------------------------
+	@classmethod
+	def make(cls, suitIndex, rank):
+		
+		self = object.__new__(cls)
+		
+		if rank == UNDEFINED or suitIndex == UNDEFINED:
+			theID = UNDEFINED
+		elif rank == UNKNOWN or suitIndex == UNKNOWN_SUIT:
+			theID = UNKNOWN_ID
 		else:
-			self.suit = "undefined"	
-			
+			theID = cardID(suitIndex, rank)
+		
+		object.__setattr__(self, "id", theID)
+		object.__setattr__(self, "suitIndex", suitIndex)
+		object.__setattr__(self, "number", RANK_NUMBERS[rank])
+		object.__setattr__(self, "suit", SUIT_NAMES[suitIndex])
+		
+		#Unknown and undefined numbers have no rank of their own
+		object.__setattr__(self, "rank", max(rank, UNKNOWN))
+		
+		return self
+		
+	#---------------------------------------------------------------------------
+	#	__setattr__()
+	#
+	#	Cards are shared between every deck, hand and game state, so they can
+	#	never be changed once made
+	#---------------------------------------------------------------------------
+	def __setattr__(self, name, value):
+		raise AttributeError("Card objects are immutable")
+		
+	#---------------------------------------------------------------------------
+	#	__reduce__()
+	#
+	#	Pickled and copied cards come back as the interned instance
+	#---------------------------------------------------------------------------
+	def __reduce__(self):
+		return (Card, (self.suit, self.number))
 	
 	#---------------------------------------------------------------------------
 	#	isValid()
@@ -85,17 +100,7 @@ class Card:
 	#	Returns true if the suit is not undefined. False if undefined.
 	#---------------------------------------------------------------------------	
 	def isValid(self):
-		if self.suit != "undefined" and self.number != "undefined":
-
-			#Assert that it is not some other string (should never happen)
-			assert (self.suit == self.HEARTS or self.suit == self.DIAMONDS or self.suit == self.CLUBS or self.suit == self.SPADES or self.suit == "unknown")
-			assert (self.number == "2" or self.number == "3" or self.number == "4" or self.number == "5" or self.number == "6" or
-					self.number == "7" or self.number == "8" or self.number == "9" or self.number == "10" or self.number == "unknown" or
-					self.number == "J" or self.number == "Q" or self.number == "K" or self.number == "A")
-
-			return True
-		else:
-			return False
+		return self.id != UNDEFINED
 			
 	#---------------------------------------------------------------------------
 	#	isMatch()
@@ -104,12 +109,7 @@ class Card:
 	#---------------------------------------------------------------------------	
 	def isMatch(self, card):
 		
-		if not (card.isValid() and self.isValid()):
-			return False
-		elif card.suit == self.suit and card.number == self.number:
-			return True
-		else:
-			return False
+		return self is card and self.id != UNDEFINED
 			
 				
 	#---------------------------------------------------------------------------
@@ -119,22 +119,11 @@ class Card:
 	#---------------------------------------------------------------------------	
 	def isColorMatch(self, card):
 
-		if self.suit == self.HEARTS or self.suit == self.DIAMONDS:
-			color1 = "R"
-		else:
-			color1 = "B"
-		
-		if card.suit == self.HEARTS or card.suit == self.DIAMONDS:
-			color2 = "R"
-		else:
-			color2 = "B"
-
-		if not (card.isValid() and self.isValid()):
-			return False
-		elif color1 == color2:
-			return True
-		else:
+		if self.id == UNDEFINED or card.id == UNDEFINED:
 			return False
+		
+		#Hearts and diamonds are suits 0 and 1, everything else counts as black
+		return (self.suitIndex < 2) == (card.suitIndex < 2)
 			
 	#---------------------------------------------------------------------------
 	#	isPair()
@@ -143,7 +132,7 @@ class Card:
 	#---------------------------------------------------------------------------	
 	def isPair(self, card):
 		
-		return (card.isValid() and self.isValid()) and self.number == card.number	
+		return self.id != UNDEFINED and card.id != UNDEFINED and self.rank == card.rank
 		
 	#---------------------------------------------------------------------------
 	#	isSuited()
@@ -152,7 +141,7 @@ class Card:
 	#---------------------------------------------------------------------------	
 	def isSuited(self, card):
 
-		return (card.isValid() and self.isValid()) and self.suit == card.suit
+		return self.id != UNDEFINED and card.id != UNDEFINED and self.suitIndex == card.suitIndex
 		
 	#---------------------------------------------------------------------------
 	#	getRank()
@@ -162,36 +151,8 @@ class Card:
 	#---------------------------------------------------------------------------
 	def getRank(self):
 		
-		if self.number == "1":
-			return 1
-		elif self.number == "2":
-			return 2	
-		elif self.number == "3":
-			return 3
-		elif self.number == "4":
-			return 4
-		elif self.number == "5":
-			return 5					
-		elif self.number == "6":
-			return 6	
-		elif self.number == "7":
-			return 7
-		elif self.number == "8":
-			return 8	
-		elif self.number == "9":
-			return 9
-		elif self.number == "10":
-			return 10	
-		elif self.number == "J":
-			return 11
-		elif self.number == "Q":
-			return 12	
-		elif self.number == "K":
-			return 13	
-		elif self.number == "A":
-			return 14
-		else:
-			return -1					
+		return self.rank
+			
 	#---------------------------------------------------------------------------
 	#	isKnown()
 	#
@@ -199,12 +160,328 @@ class Card:
 	#---------------------------------------------------------------------------	
 	def isKnown(self):
 
-		return self.isValid() and self.suit != "unknown" and self.number != "unknown"		
+		return 0 <= self.id < UNKNOWN_ID
 		
+#========================================
+#	LOOKUP TABLES
+#
+#	Every known card has an id from 0 to 51, ordered the same way as a new
+#	deck: id = 4*(rank-2) + suit index, with the suits ordered hearts,
+#	diamonds, spades, clubs. Rank and suit can be recovered from an id by
+#	RANK_OF_ID and SUIT_OF_ID.
+#========================================
+
+UNDEFINED = -2
+UNKNOWN = -1
+UNKNOWN_SUIT = 4
+UNKNOWN_ID = 52
+
+SUITS = [Card.HEARTS, Card.DIAMONDS, Card.SPADES, Card.CLUBS]
+NUMBERS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+RANK_OF_ID = [i / 4 + 2 for i in range(52)]
+SUIT_OF_ID = [i % 4 for i in range(52)]
+
+#Every spelling the constructor accepts, mapped to a suit index or rank
+SUIT_INDICES = {"hearts":0, "h":0, "diamonds":1, "d":1, "spades":2, "s":2,
+				"clubs":3, "c":3, "unknown":UNKNOWN_SUIT, "?":UNKNOWN_SUIT}
+
+NUMBER_RANKS = {"2":2, "3":3, "4":4, "5":5, "6":6, "7":7, "8":8, "9":9, "10":10,
+				"J":11, "JACK":11, "Q":12, "QUEEN":12, "K":13, "KING":13,
+				"A":14, "ACE":14, "1":14, "UNKNOWN":UNKNOWN, "?":UNKNOWN}
+
+SUIT_NAMES = {UNKNOWN_SUIT:"unknown", UNDEFINED:"undefined"}
+for i in range(4):
+	SUIT_NAMES[i] = SUITS[i]
+
+RANK_NUMBERS = {UNKNOWN:"unknown", UNDEFINED:"undefined"}
+for i in range(13):
+	RANK_NUMBERS[i + 2] = NUMBERS[i]
+	
 #========================================
 #	FUNCTIONS
-#========================================					
+#========================================
+
+#---------------------------------------------------------------------------
+#	cardID(suitIndex, rank)
+#
+#	Returns the integer id of the card with the given suit index and rank
+#---------------------------------------------------------------------------
+def cardID(suitIndex, rank):
+	
+	return 4 * (rank - 2) + suitIndex
+	
+#---------------------------------------------------------------------------
+#	fromID(cardID)
+#
+#	Returns the Card with the given integer id
+#---------------------------------------------------------------------------
+def fromID(theID):
+	
+	return CARDS_BY_ID[theID]
+
+#========================================
+#	INTERNED CARDS
+#
+#	One shared Card for every suit index and rank code, including the unknown
+#	and undefined ones. Card() and fromID() only ever hand these out.
+#========================================
+
+INTERNED = {}
+for s in [UNDEFINED, 0, 1, 2, 3, UNKNOWN_SUIT]:
+	for r in [UNDEFINED, UNKNOWN] + range(2, 15):
+		INTERNED[(s, r)] = Card.make(s, r)
+
+CARDS_BY_ID = [INTERNED[(SUIT_OF_ID[i], RANK_OF_ID[i])] for i in range(52)]
+UNKNOWN_CARD = INTERNED[(UNKNOWN_SUIT, UNKNOWN)]
+
+#---------------------------------------------------------------------------
+#	CardSet class
+#
+#	An immutable set of known cards stored as a single integer bitmask, where
+#	bit i is set if the card with id i is in the set. Unions, differences and
+#	membership tests are single integer operations.
+#---------------------------------------------------------------------------
+class CardSet(object):
+	
+	__slots__ = ("mask",)
+	
+	#---------------------------------------------------------------------------
+	#	Constructor
+	#
+	#	Takes an optional list (or any iterable) of known cards, or a ready-made
+	#	bitmask
+	#---------------------------------------------------------------------------
+	def __init__(self, cards=None, mask=0):
+		
+		if cards != None:
+			for c in cards:
+				assert 0 <= c.id < UNKNOWN_ID
+				mask |= 1 << c.id
+				
+		self.mask = mask
+		
+	#---------------------------------------------------------------------------
+	#	union(), difference(), intersection()
+	#
+	#	Return new sets, also available as the |, - and & operators
+	#---------------------------------------------------------------------------
+	def union(self, other):
+		return CardSet(mask = self.mask | other.mask)
+		
+	def difference(self, other):
+		return CardSet(mask = self.mask & ~other.mask)
+		
+	def intersection(self, other):
+		return CardSet(mask = self.mask & other.mask)
+		
+	__or__ = union
+	__sub__ = difference
+	__and__ = intersection
+	
+	#---------------------------------------------------------------------------
+	#	isDisjoint()
+	#
+	#	Returns true if the two sets share no cards
+	#---------------------------------------------------------------------------
+	def isDisjoint(self, other):
+		return self.mask & other.mask == 0
+		
+	#---------------------------------------------------------------------------
+	#	__contains__()
+	#
+	#	Membership test for a Card (unknown and undefined cards are never in a set)
+	#---------------------------------------------------------------------------
+	def __contains__(self, card):
+		return card.id >= 0 and (self.mask >> card.id) & 1 == 1
+		
+	#---------------------------------------------------------------------------
+	#	__len__()
+	#
+	#	Number of cards in the set (popcount of the mask)
+	#---------------------------------------------------------------------------
+	def __len__(self):
+		return bin(self.mask).count("1")
+		
+	def __nonzero__(self):
+		return self.mask != 0
+		
+	#---------------------------------------------------------------------------
+	#	__iter__()
+	#
+	#	Yields the cards in the set in id (new deck) order
+	#---------------------------------------------------------------------------
+	def __iter__(self):
+		
+		mask = self.mask
+		while mask:
+			lowest = mask & -mask
+			yield CARDS_BY_ID[lowest.bit_length() - 1]
+			mask ^= lowest
+			
+	#---------------------------------------------------------------------------
+	#	ids()
+	#
+	#	Returns a list of the integer ids in the set, in increasing order
+	#---------------------------------------------------------------------------
+	def ids(self):
+		
+		result = []
+		mask = self.mask
+		while mask:
+			lowest = mask & -mask
+			result.append(lowest.bit_length() - 1)
+			mask ^= lowest
 			
+		return result
+			
+	#---------------------------------------------------------------------------
+	#	Comparison and hashing
+	#
+	#	Sets compare by contents, so they can be used as dictionary keys
+	#---------------------------------------------------------------------------
+	def __eq__(self, other):
+		return isinstance(other, CardSet) and self.mask == other.mask
+		
+	def __ne__(self, other):
+		return not self.__eq__(other)
+		
+	def __hash__(self):
+		return hash(self.mask)
+		
+#Masks for all 52 cards, every card of one suit and every card of one rank
+FULL_SET = CardSet(mask = (1 << 52) - 1)
+SUIT_SETS = [CardSet(mask = sum([1 << i for i in range(52) if SUIT_OF_ID[i] == s])) for s in range(4)]
+RANK_SETS = {}
+for r in range(2, 15):
+	RANK_SETS[r] = CardSet(mask = 0xF << cardID(0, r))
+
+#========================================
+#	COMPACT NOTATION
+#
+#	Cards written as a rank character and a suit character ("Ah", "Td",
+#	"9s"), run together or separated ("AhKd", "Ts 9s 8c"). Every two
+#	character name in any mix of case is precomputed, so bulk parsing is a
+#	dictionary lookup per card.
+#========================================
+
+RANK_CHARACTERS = "23456789TJQKA"
+SUIT_CHARACTERS = "hdsc"
+
+#Characters allowed between cards
+SEPARATORS = " ,;|[]()\t\r\n"
+
+COMPACT_NAMES = [RANK_CHARACTERS[RANK_OF_ID[i] - 2] + SUIT_CHARACTERS[SUIT_OF_ID[i]] for i in range(52)]
+
+COMPACT_IDS = {}
+for i in range(52):
+	for rankChar in [COMPACT_NAMES[i][0], COMPACT_NAMES[i][0].lower()]:
+		for suitChar in [COMPACT_NAMES[i][1], COMPACT_NAMES[i][1].upper()]:
+			COMPACT_IDS[rankChar + suitChar] = i
+
+#---------------------------------------------------------------------------
+#	parseCards(text)
+#
+#	Turns a string in compact notation into a list of card ids. Raises a
+#	ValueError if any part of it isn't a card.
+#---------------------------------------------------------------------------
+def parseCards(text):
+	
+	#Works for unicode as well as str (unicode.translate() takes a different table)
+	text = "".join([ch for ch in text.replace("10", "T") if not ch in SEPARATORS])
+	
+	try:
+		return [COMPACT_IDS[text[i:i+2]] for i in xrange(0, len(text), 2)]
+	except KeyError:
+		bad = [text[i:i+2] for i in xrange(0, len(text), 2) if not text[i:i+2] in COMPACT_IDS]
+		raise ValueError("Not a card in compact notation: '" + bad[0] + "'")
+	
+#---------------------------------------------------------------------------
+#	parseCardSet(text)
+#
+#	Same as parseCards() but returns a CardSet
+#---------------------------------------------------------------------------
+def parseCardSet(text):
+	
+	mask = 0
+	for i in parseCards(text):
+		mask |= 1 << i
+		
+	return CardSet(mask = mask)
+	
+#---------------------------------------------------------------------------
+#	parseFile(path, asSets)
+#
+#	Parses a file with one group of cards per line (a hand history, a list
+#	of boards...) and returns a list with the card ids of each non-empty
+#	line, or a CardSet per line if asSets is true
+#---------------------------------------------------------------------------
+def parseFile(path, asSets = False):
+	
+	theFile = open(path)
+	try:
+		lines = theFile.read().splitlines()
+	finally:
+		theFile.close()
+	
+	if asSets:
+		parse = parseCardSet
+	else:
+		parse = parseCards
+		
+	return [parse(line) for line in lines if line.strip()]
+	
+#---------------------------------------------------------------------------
+#	formatCards(cards, separator)
+#
+#	The reverse of parseCards(): takes Cards, card ids or a CardSet and
+#	returns them in compact notation
+#---------------------------------------------------------------------------
+def formatCards(cards, separator = ""):
+	
+	if isinstance(cards, CardSet):
+		cards = cards.ids()
+		
+	return separator.join([COMPACT_NAMES[getattr(c, "id", c)] for c in cards])
+			
+
+#========================================
+#	SUIT ISOMORPHISM
+#
+#	No suit is better than another, so swapping suits around in every card
+#	of a situation (say hearts for spades and spades for hearts) doesn't
+#	change anybody's chances. canonicalize() picks one situation to stand
+#	for all of those relabellings.
+#========================================
+
+#All 24 ways of relabelling the suits, and for each one the id every card
+#turns into: PERMUTED_IDS[p][id]
+SUIT_PERMUTATIONS = list(itertools.permutations(range(4)))
+PERMUTED_IDS = [[cardID(p[SUIT_OF_ID[i]], RANK_OF_ID[i]) for i in range(52)] for p in SUIT_PERMUTATIONS]
+
+#---------------------------------------------------------------------------
+#	canonicalize(groups)
+#
+#	Takes a list of groups of Cards or card ids, e.g. [pocket1, pocket2, board],
+#	where the order of the groups matters but the order within each group
+#	doesn't. Tries every suit relabelling and returns the smallest one as a
+#	tuple of sorted id tuples, so two situations give the same result exactly
+#	when one is a relabelling of the other:
+#
+#		canonicalize([AhKh, QdQc, 2s3s4d]) == canonicalize([AsKs, QhQd, 2c3c4h])
+#---------------------------------------------------------------------------
+def canonicalize(groups):
+	
+	groups = [[getattr(c, "id", c) for c in g] for g in groups]
+	
+	best = None
+	for permuted in PERMUTED_IDS:
+		relabelled = tuple([tuple(sorted([permuted[i] for i in g])) for g in groups])
+		if best == None or relabelled < best:
+			best = relabelled
+			
+	return best
+	
 				
 #========================================
 #	TESTS
@@ -381,4 +658,127 @@ if __name__ == '__main__':
 	card = Card("!", "!")
 	assert not card.isKnown()
 	
+	print "Test successful."
+	
+	print "Testing card ids"
+	
+	card = Card("H", "2")
+	assert card.id == 0 and card.rank == 2 and card.suitIndex == 0
+	card = Card("C", "A")
+	assert card.id == 51 and card.rank == 14 and card.suitIndex == 3
+	card = Card("s", "10")
+	assert RANK_OF_ID[card.id] == 10 and SUITS[SUIT_OF_ID[card.id]] == Card.SPADES
+	card = Card("?", "?")
+	assert card.id == UNKNOWN_ID and card.getRank() == -1
+	card = Card("!", "A")
+	assert card.id == UNDEFINED and not card.isValid()
+	
+	for i in range(52):
+		card = fromID(i)
+		assert card.id == i and card.isKnown()
+		assert card.isMatch(Card(card.suit, card.number))
+		
+	assert Card("h", "?").isMatch(Card(Card.HEARTS, "unknown"))
+	assert not Card("h", "?").isMatch(Card("s", "?"))
+	
+	print "Test successful."
+	
+	print "Testing interning"
+	
+	assert Card("H", "A") is Card(Card.HEARTS, "ace")
+	assert Card("?", "?") is UNKNOWN_CARD
+	assert Card("!", "2") is Card("undefined", "2")
+	assert Card("D", "10") == fromID(Card("D", "10").id)
+	assert Card("D", "10") != Card("H", "10")
+	
+	import copy, pickle
+	card = Card("S", "K")
+	assert copy.copy(card) is card
+	assert pickle.loads(pickle.dumps(card)) is card
+	assert pickle.loads(pickle.dumps(card, 2)) is card
+	
+	try:
+		card.number = "Q"
+		assert False
+	except AttributeError:
+		pass
+	
+	print "Test successful."
+	
+	print "Testing CardSet"
+	
+	a = CardSet([Card("H", "A"), Card("S", "2"), Card("C", "10")])
+	b = CardSet([Card("S", "2"), Card("D", "K")])
+	assert len(a) == 3 and len(b) == 2
+	assert Card("H", "A") in a and not Card("H", "K") in a
+	assert not Card("?", "?") in a
+	assert len(a | b) == 4
+	assert list(a - b) == [Card("C", "10"), Card("H", "A")]
+	assert list(a & b) == [Card("S", "2")]
+	assert a.ids() == [Card("S", "2").id, Card("C", "10").id, Card("H", "A").id]
+	assert not a.isDisjoint(b) and (a - b).isDisjoint(b)
+	assert CardSet(list(a)) == a and hash(CardSet(list(a))) == hash(a)
+	assert not CardSet()
+	
+	assert len(FULL_SET) == 52 and list(FULL_SET) == CARDS_BY_ID
+	for s in range(4):
+		assert len(SUIT_SETS[s]) == 13
+		for card in SUIT_SETS[s]:
+			assert card.suitIndex == s
+	for r in range(2, 15):
+		assert len(RANK_SETS[r]) == 4
+		for card in RANK_SETS[r]:
+			assert card.rank == r
+	
+	print "Test successful."
+	
+	print "Testing compact notation"
+	
+	assert parseCards("AhKd") == [Card("H", "A").id, Card("D", "K").id]
+	assert parseCards("Ts9s8c") == parseCards("ts 9S, 8C") == parseCards("10s 9s 8c")
+	assert parseCards("") == []
+	assert parseCards(u"Ts 9s, 8c") == parseCards("Ts9s8c")
+	assert parseCardSet(u"10h\tJh") == parseCardSet("ThJh")
+	assert parseCardSet("2h 2h 3c") == CardSet([Card("H", "2"), Card("C", "3")])
+	
+	for bad in ["Ah K", "Xh", "AhKx", "A", u"Ah\u00e9h"]:
+		try:
+			parseCards(bad)
+			assert False
+		except ValueError:
+			pass
+	
+	assert formatCards(FULL_SET) == "".join(COMPACT_NAMES)
+	assert parseCards(formatCards(range(52))) == range(52)
+	assert formatCards([Card("S", "10"), Card("D", "J")], " ") == "Ts Jd"
+	assert formatCards(parseCardSet("Kd Ah")) == "KdAh"
+	
+	import tempfile, os
+	handle, path = tempfile.mkstemp()
+	os.write(handle, "AhKd\n\nTs9s8c 2d\n")
+	os.close(handle)
+	assert parseFile(path) == [parseCards("AhKd"), parseCards("Ts9s8c2d")]
+	assert parseFile(path, True)[1] == parseCardSet("2d 8c 9s Ts")
+	os.remove(path)
+	
+	print "Test successful."
+	
+	print "Testing suit isomorphism"
+	
+	assert len(SUIT_PERMUTATIONS) == 24
+	for permuted in PERMUTED_IDS:
+		assert sorted(permuted) == range(52)
+	
+	#The example from canonicalize() and some other relabellings of it
+	situation = [parseCards("AhKh"), parseCards("QdQc"), parseCards("2s3s4d")]
+	assert canonicalize(situation) == canonicalize([parseCards("AsKs"), parseCards("QhQd"), parseCards("2c3c4h")])
+	assert canonicalize(situation) == canonicalize([parseCards("KhAh"), parseCards("QcQd"), parseCards("4d2s3s")])
+	assert canonicalize(situation) != canonicalize([parseCards("AhKh"), parseCards("QdQs"), parseCards("2s3s4d")])
+	assert canonicalize(situation) != canonicalize([parseCards("QdQc"), parseCards("AhKh"), parseCards("2s3s4d")])
+	assert canonicalize([[Card("H", "A"), Card("H", "K")]]) == canonicalize([parseCards("AcKc")])
+	
+	#The 1326 pockets fall into the usual 169 kinds of starting hand
+	pockets = set([canonicalize([pocket]) for pocket in itertools.combinations(range(52), 2)])
+	assert len(pockets) == 169
+	
 	print "Test successful."					
\ No newline at end of file
@@ -4,51 +4,101 @@
 #	Description:
 #
 #	Creates a new deck of 52 cards, includes methods for shuffling and
-#	drawing cards.
+#	drawing cards. Also generates whole batches of shuffled decks as NumPy
+#	arrays for simulations (NumPy is optional and only needed for that).
 #
 #---------------------------------------------------------------------------
 
-from card import Card
+from card import Card, CardSet, CARDS_BY_ID, FULL_SET, cardID, NUMBER_RANKS, SUIT_INDICES, UNDEFINED, UNKNOWN_SUIT
 import random
 
-random.seed()
+#NumPy is only needed for the batched deck generation below
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 #---------------------------------------------------------------------------
 #	Deck class
+#
+#	The cards sit in a fixed list and are never copied while dealing. A
+#	cursor marks the top of the deck (everything before it has been drawn)
+#	and a bitmask of card ids records which cards are still in the deck, so
+#	draw() and pull() are both constant time. Pulled cards are left in
+#	place and simply skipped when the cursor reaches them.
 #---------------------------------------------------------------------------
-class Deck():
+class Deck(object):
 	
 	#---------------------------------------------------------------------------
 	#	Constructor
+	#
+	#	Optionally takes the random generator used for shuffling (a
+	#	random.Random, e.g. from streams.RNGStreams). Without one the deck
+	#	shuffles with the global random module.
 	#---------------------------------------------------------------------------
-	def __init__(self):
-		
-		self.cards = [Card("H", "2"), Card("D", "2"), Card("S", "2"), Card("C", "2"),
-					  Card("H", "3"), Card("D", "3"), Card("S", "3"), Card("C", "3"),
-					  Card("H", "4"), Card("D", "4"), Card("S", "4"), Card("C", "4"),
-					  Card("H", "5"), Card("D", "5"), Card("S", "5"), Card("C", "5"),
-					  Card("H", "6"), Card("D", "6"), Card("S", "6"), Card("C", "6"),
-					  Card("H", "7"), Card("D", "7"), Card("S", "7"), Card("C", "7"),
-					  Card("H", "8"), Card("D", "8"), Card("S", "8"), Card("C", "8"),
-					  Card("H", "9"), Card("D", "9"), Card("S", "9"), Card("C", "9"),
-					  Card("H", "10"), Card("D", "10"), Card("S", "10"), Card("C", "10"),
-					  Card("H", "J"), Card("D", "J"), Card("S", "J"), Card("C", "J"),
-					  Card("H", "Q"), Card("D", "Q"), Card("S", "Q"), Card("C", "Q"),
-					  Card("H", "K"), Card("D", "K"), Card("S", "K"), Card("C", "K"),
-					  Card("H", "A"), Card("D", "A"), Card("S", "A"), Card("C", "A"),]
-		
-		assert len(self.cards) == 52
-		for card in self.cards:
-			assert card.isValid()
+	def __init__(self, rng=None):
+		
+		if rng == None:
+			rng = random
+		self.rng = rng
+		
+		#Card ids already run in deck order (2s through aces, hearts/diamonds/spades/clubs)
+		#and the cards themselves are the shared interned instances
+		self.order = list(CARDS_BY_ID)
+		self.top = 0
+		self.live = FULL_SET.mask
+		self.numLeft = 52
+		self.lazy = False
+		
+		assert len(self.order) == 52
+			
+	#---------------------------------------------------------------------------
+	#	cards
+	#
+	#	The cards still in the deck, top first, as a new list
+	#---------------------------------------------------------------------------
+	@property
+	def cards(self):
+		
+		#The order of the undealt cards has to be settled before it can be shown
+		if self.lazy:
+			rest = self.order[self.top:]
+			self.rng.shuffle(rest)
+			self.order[self.top:] = rest
+			self.lazy = False
+		
+		live = self.live
+		return [c for c in self.order[self.top:] if (live >> c.id) & 1]
+		
+	#---------------------------------------------------------------------------
+	#	__len__()
+	#
+	#	Number of cards still in the deck
+	#---------------------------------------------------------------------------
+	def __len__(self):
+		return self.numLeft
 			
 	#---------------------------------------------------------------------------
 	#	shuffle()
 	#	
 	#	Shuffles the deck of cards to a randomized order
+	#
+	#	With lazy=True nothing is shuffled up front. Instead every draw() does
+	#	one Fisher-Yates step, swapping a uniformly chosen undealt card to the
+	#	top, so the cost scales with the number of cards dealt while the dealt
+	#	cards are distributed exactly as after a full shuffle.
 	#---------------------------------------------------------------------------
-	def shuffle(self):
+	def shuffle(self, lazy=False):
+		
+		#Drop drawn and pulled cards first, unless the deck is still complete
+		if self.numLeft < len(self.order):
+			live = self.live
+			self.order = [c for c in self.order[self.top:] if (live >> c.id) & 1]
+			self.top = 0
+		self.lazy = lazy
 		
-		random.shuffle(self.cards)
+		if not lazy:
+			self.rng.shuffle(self.order)
 		
 	#---------------------------------------------------------------------------
 	#	draw()
@@ -58,12 +108,26 @@ class Deck():
 	#---------------------------------------------------------------------------
 	def draw(self):
 		
-		if len(self.cards) > 0:
-			card = self.cards[0]
-			self.cards = self.cards[1:]
-			return card
-		else:
-			return None
+		order = self.order
+		while self.top < len(order):
+			
+			if self.lazy:
+				#One Fisher-Yates step: bring a random undealt card to the top
+				top = self.top
+				swap = top + int(self.rng.random() * (len(order) - top))
+				order[top], order[swap] = order[swap], order[top]
+				
+			card = order[self.top]
+			self.top += 1
+			
+			#Skip over cards that have already been pulled
+			bit = 1 << card.id
+			if self.live & bit:
+				self.live ^= bit
+				self.numLeft -= 1
+				return card
+				
+		return None
 
 	#---------------------------------------------------------------------------
 	#	pull()
@@ -72,12 +136,118 @@ class Deck():
 	#	a numeric rank or a string number depending on which is easier
 	#---------------------------------------------------------------------------
 	def pull(self, suit, number="!", rank=-2):
-		i = 0
-		for c in self.cards:
-			if c.suit == suit and (rank == c.getRank() or number == c.number):
-				self.cards = self.cards[:i] + self.cards[i+1:]		
-				break
-			i+=1
+		
+		if rank < 2:
+			rank = NUMBER_RANKS.get(number.upper(), UNDEFINED)
+		suitIndex = SUIT_INDICES.get(suit.lower(), UNDEFINED)
+		if rank < 2 or suitIndex < 0 or suitIndex == UNKNOWN_SUIT:
+			return
+		
+		self.pullID(cardID(suitIndex, rank))
+		
+	#---------------------------------------------------------------------------
+	#	pullID()
+	#	
+	#	Takes the card with the given integer id from the deck
+	#---------------------------------------------------------------------------
+	def pullID(self, theID):
+		
+		bit = 1 << theID
+		if self.live & bit:
+			self.live ^= bit
+			self.numLeft -= 1
+			
+	#---------------------------------------------------------------------------
+	#	pullAll()
+	#	
+	#	Takes every card in the given list or CardSet out of the deck at once,
+	#	keeping the remaining cards in order
+	#---------------------------------------------------------------------------
+	def pullAll(self, deadCards):
+		
+		if not isinstance(deadCards, CardSet):
+			deadCards = CardSet(deadCards)
+			
+		self.live &= ~deadCards.mask
+		self.numLeft = bin(self.live).count("1")
+	
+	
+#========================================
+#	FUNCTIONS
+#========================================
+
+#---------------------------------------------------------------------------
+#	remainingCards(deadCards)
+#
+#	Returns the cards left in a full deck once the dead cards (a list or
+#	CardSet) are taken out, as a tuple in new-deck order. This is a
+#	read-only view built straight from the card masks rather than a Deck,
+#	and the result for each set of dead cards is cached, so repeated
+#	calculations with the same known cards share one copy.
+#---------------------------------------------------------------------------
+REMAINING_CACHE_SIZE = 4096
+remainingCache = {}
+
+def remainingCards(deadCards):
+	
+	if not isinstance(deadCards, CardSet):
+		deadCards = CardSet(deadCards)
+		
+	remaining = remainingCache.get(deadCards.mask)
+	if remaining == None:
+		
+		#Keep the cache bounded, it's cheap to rebuild
+		if len(remainingCache) >= REMAINING_CACHE_SIZE:
+			remainingCache.clear()
+			
+		remaining = tuple(FULL_SET - deadCards)
+		remainingCache[deadCards.mask] = remaining
+		
+	return remaining
+	
+
+#---------------------------------------------------------------------------
+#	shuffledDecks(n, k, deadCards, rng)
+#
+#	Returns n independently shuffled decks at once as an (n, k) uint8 NumPy
+#	array of card ids, for Monte Carlo work where shuffling Deck objects one
+#	at a time is too slow. Only the first k cards of each deck are returned
+#	(all remaining cards by default), and any dead cards (a list or CardSet)
+#	are left out of every deck.
+#
+#	All the randomness comes from a single vectorized call: each live card
+#	gets a uniform sort key per deck and the decks are the key orderings.
+#	rng can be a numpy.random.RandomState, otherwise numpy's global one is used.
+#---------------------------------------------------------------------------
+def shuffledDecks(n, k=None, deadCards=None, rng=None):
+	
+	assert numpy != None, "shuffledDecks() requires NumPy"
+	
+	if rng == None:
+		rng = numpy.random
+	
+	live = FULL_SET
+	if deadCards != None:
+		if not isinstance(deadCards, CardSet):
+			deadCards = CardSet(deadCards)
+		live = live - deadCards
+	ids = numpy.array(live.ids(), dtype=numpy.uint8)
+	
+	if k == None:
+		k = len(ids)
+	assert 0 <= k <= len(ids)
+	
+	keys = rng.random_sample((n, len(ids)))
+	
+	if k < len(ids):
+		#Only the k smallest keys matter: find them first, then put just those in order
+		rows = numpy.arange(n)[:, None]
+		chosen = numpy.argpartition(keys, k, axis=1)[:, :k]
+		order = chosen[rows, numpy.argsort(keys[rows, chosen], axis=1)]
+	else:
+		order = numpy.argsort(keys, axis=1)
+		
+	return ids[order]
 	
 	
 #========================================
@@ -109,4 +279,99 @@ if __name__ == '__main__':
 	
 	card = deck.draw()
 	assert card == None
+	
+	deck = Deck()
+	deck.shuffle(lazy=True)
+	drawn = CardSet([deck.draw() for i in range(52)])
+	assert drawn == FULL_SET and deck.draw() == None
+	
+	deck = Deck()
+	deck.pullAll([Card("H", "2"), Card("C", "A")])
+	deck.shuffle(lazy=True)
+	drawn = [deck.draw() for i in range(10)]
+	assert len(deck) == 40 and len(deck.cards) == 40
+	assert len(CardSet(drawn + deck.cards)) == 50
+	assert not Card("H", "2") in CardSet(drawn + deck.cards)
+	
+	#Lazy dealing should give every card the same chance of each position
+	counts = [0] * 52
+	for i in range(26000):
+		deck = Deck()
+		deck.shuffle(lazy=True)
+		deck.draw()
+		counts[deck.draw().id] += 1
+	assert min(counts) > 350 and max(counts) < 650
+	
+	dead = [Card("H", "A"), Card("S", "4"), Card("D", "2")]
+	remaining = remainingCards(dead)
+	assert len(remaining) == 49 and remaining[0].isMatch(Card("H", "2"))
+	deck = Deck()
+	deck.pullAll(dead)
+	assert list(remaining) == deck.cards
+	assert remainingCards(CardSet(dead)) is remaining
+	assert len(remainingCards([])) == 52
+	
+	#Decks with their own generators deal reproducibly
+	import streams
+	for lazy in [False, True]:
+		deck1 = Deck(streams.RNGStreams(7).stream("deck"))
+		deck2 = Deck(streams.RNGStreams(7).stream("deck"))
+		deck3 = Deck(streams.RNGStreams(8).stream("deck"))
+		for d in [deck1, deck2, deck3]:
+			d.shuffle(lazy)
+		hand1 = [deck1.draw() for i in range(9)]
+		assert hand1 == [deck2.draw() for i in range(9)]
+		assert hand1 != [deck3.draw() for i in range(9)]
+		
+	if numpy != None:
+		rng = streams.RNGStreams(7).numpyStream("batch")
+		decks = shuffledDecks(100, 9, rng = rng)
+		assert (decks == shuffledDecks(100, 9, rng = streams.RNGStreams(7).numpyStream("batch"))).all()
+		
+	if numpy != None:
+		decks = shuffledDecks(1000)
+		assert decks.shape == (1000, 52) and decks.dtype == numpy.uint8
+		for row in decks[:50]:
+			assert sorted(row) == range(52)
+			
+		dead = [Card("H", "A"), Card("D", "A"), Card("C", "2")]
+		decks = shuffledDecks(20000, 3, dead)
+		assert decks.shape == (20000, 3)
+		for c in dead:
+			assert not (decks == c.id).any()
+		assert (decks[:, 0] != decks[:, 1]).all() and (decks[:, 1] != decks[:, 2]).all()
+		
+		#Every live card should be about equally likely in every dealt position
+		for position in range(3):
+			counts = numpy.bincount(decks[:, position], minlength=52)
+			assert counts[Card("H", "A").id] == 0
+			assert counts.max() < 550 and sorted(counts)[3] > 280
+		
+		assert shuffledDecks(5, 0).shape == (5, 0)
+	
+	deck = Deck()
+	deck.pullAll([Card("H", "2"), Card("C", "A"), Card("S", "10")])
+	assert len(deck.cards) == 49
+	assert deck.draw().isMatch(Card("D", "2"))
+	deck.pullAll(CardSet([Card("S", "2"), Card("H", "A")]))
+	assert len(deck.cards) == 46
+	assert deck.draw().isMatch(Card("C", "2"))
+	
+	deck = Deck()
+	for i in range(10):
+		deck.draw()
+	deck.pull(Card.HEARTS, "2")
+	assert len(deck) == 42 and len(deck.cards) == 42
+	deck.pull(Card.HEARTS, "5")
+	assert len(deck) == 41 and deck.draw().isMatch(Card("S", "4"))
+	deck.shuffle()
+	assert len(deck) == 40 and len(deck.cards) == 40
+	
+	deck = Deck()
+	deck.pull(Card.SPADES, "10")
+	deck.pull(Card.HEARTS, rank = 14)
+	deck.pull(Card.HEARTS, rank = 14)
+	assert len(deck.cards) == 50
+	for card in deck.cards:
+		assert not card.isMatch(Card("S", "10")) and not card.isMatch(Card("H", "A"))
 	print "Test complete."		
\ No newline at end of file
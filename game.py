@@ -24,11 +24,18 @@ class Game():
 	#
 	#	Passed a settings object the game will initialize the game settings to
 	#	begin playing poker.
+	#
+	#	Optionally takes a streams.RNGStreams for this table. Each hand then
+	#	gets its own deck and AI generators derived from the hand number, so
+	#	the game is reproducible and any single hand can be dealt again on its
+	#	own. Without one the global random module is used.
 	#---------------------------------------------------------------------------	
-	def __init__(self, theSettings, theInterfaceConstructor=None, theInterfaces=[]):
+	def __init__(self, theSettings, theInterfaceConstructor=None, theInterfaces=[], streams=None):
 		
 		self.settings = theSettings
 		self.players = []
+		self.streams = streams
+		self.handNumber = 0
 		
 		for i in range(self.settings.numPlayers):
 			
@@ -129,9 +136,16 @@ class Game():
 				p.isInHand = True
 		self.numInHand = self.numInGame
 		
-		#Make a new deck and shuffle it
-		self.deck = deck.Deck()
-		self.deck.shuffle()
+		#Make a new deck and shuffle it (lazily, only the cards dealt get randomized)
+		if self.streams != None:
+			self.deck = deck.Deck(self.streams.stream("deck", self.handNumber))
+			for p in self.players:
+				if isinstance(p, AI_random.AI_Random):
+					p.rng = self.streams.stream("player", p.id, self.handNumber)
+		else:
+			self.deck = deck.Deck()
+		self.deck.shuffle(lazy=True)
+		self.handNumber += 1
 		
 		#Deal the pocket cards
 		for p in self.players:
@@ -378,6 +392,9 @@ class Game():
 		maxWin = {}
 		for p in self.players:
 			maxWin[p.id] = p.pot
+		
+		#Packed score of each hand in the showdown, to name the winner's hand by
+		scores = {}
 			
 		if self.numInHand == 1:
 			for p in self.players:
@@ -390,12 +407,10 @@ class Game():
 			
 			assert len(self.communityCards) == 5
 			
-			hands = []
-			for p in self.players:
-				if p.isInHand:
-					hands.append(hand.Hand(p.pocket + self.communityCards, ID = p.id))
-					
-			winningIDs = hand.winner(hands)
+			inHand = [p for p in self.players if p.isInHand]
+			result = hand.showdown(self.communityCards, [p.pocket for p in inHand], [p.id for p in inHand])
+			winningIDs = result[0]
+			scores = result[2]
 					
 					
 							
@@ -412,7 +427,10 @@ class Game():
 				displayText += p.name
 				#If the winner revealed their hand include some text to show who won
 				if p.hasRevealed:
-					handName = " with "+hand.Hand(p.pocket + self.communityCards).handName()
+					if ID in scores:
+						handName = " with "+hand.scoreName(scores[ID])
+					else:
+						handName = " with "+hand.Hand(p.pocket + self.communityCards).handName()
 				else:
 					handName = "."
 				token = " has won"
@@ -518,17 +536,26 @@ class Game():
 	#	Cleans the game states and passes them to each individual player.
 	#---------------------------------------------------------------------------	
 	def passToPlayers(self, miscInfo = {}):
+		
+		#Gather everyone's info once: the real info, and the version other players
+		#get to see, which is the same object unless the pocket is still hidden
+		trueInfo = []
+		publicInfo = []
+		for p in self.players:
+			info = p.getInfo()
+			trueInfo.append(info)
+			if p.hasRevealed:
+				publicInfo.append(info)
+			else:
+				publicInfo.append(p.getInfo(hidePocket = True))
 			
-		for givenPlayer in self.players:		
-
-			#Clean game state
-			cleanPlayersInfo = []
+		for i in range(len(self.players)):
+			
+			givenPlayer = self.players[i]
 
-			for p in self.players:
-				info = p.getInfo()
-				if not p.hasRevealed and p.id != givenPlayer.id:
-					info.pocket = [card.Card("?", "?"), card.Card("?", "?")]
-				cleanPlayersInfo.append(info)
+			#Clean game state: only the player's own pocket is shown to them
+			cleanPlayersInfo = publicInfo[:]
+			cleanPlayersInfo[i] = trueInfo[i]
 			
 			gameState = state.State(cleanPlayersInfo, self.communityCards, miscInfo)
 			
@@ -8,12 +8,43 @@
 #	make valid poker hands of 5 cards
 #---------------------------------------------------------------------------
 
-import card
+import card, tables
+from collections import OrderedDict
+
+#NumPy is optional, it's only needed for scoreBatch()
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+#Ranks in the order hands are read, best first
+RANKS_HIGH_TO_LOW = range(14, 1, -1)
+
+#Hand categories, the first entry of evaluate() and the top of score()
+HIGH_CARD = 0
+PAIR = 1
+TWO_PAIRS = 2
+THREE_OF_A_KIND = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+FOUR_OF_A_KIND = 7
+STRAIGHT_FLUSH = 8
+
+#Evaluation engines, see setEngine()
+COUNTS_ENGINE = "counts"
+TABLE_ENGINE = "table"
+ENGINES = [COUNTS_ENGINE, TABLE_ENGINE]
+
+engine = TABLE_ENGINE
+
+#Optional EvaluationCache in front of Hand.evaluate(), see setCache()
+evaluationCache = None
 
 #---------------------------------------------------------------------------
 #	Hand Class
 #---------------------------------------------------------------------------
-class Hand():
+class Hand(object):
 	
 	#---------------------------------------------------------------------------
 	#	Constructor
@@ -24,13 +55,104 @@ class Hand():
 		self.cards = cards
 		self.id = ID	
 		
+	#---------------------------------------------------------------------------
+	#	cards
+	#
+	#	The cards in the hand. The hand is only evaluated once, and the result
+	#	kept until it's given new cards. Assign a new list to change them,
+	#	changing the list in place won't be noticed
+	#---------------------------------------------------------------------------
+	@property
+	def cards(self):
+		return self.cardList
+		
+	@cards.setter
+	def cards(self, newCards):
+		self.cardList = newCards
+		self.cachedValue = None
+		self.cachedScore = None
+		self.cachedBestFive = None
+		
 	#---------------------------------------------------------------------------
 	#	evaluate()
 	#
 	#	Takes the hand and evaluates it as a tuple of (rank, high1, high2, high3, high4, high5)
+	#	using the engine picked with setEngine(), going through the cache if
+	#	there is one (see setCache())
 	#---------------------------------------------------------------------------
 	def evaluate(self):
 		
+		if self.cachedValue == None:
+			if self.cachedScore != None:
+				self.cachedValue = unpackScore(self.cachedScore)
+			elif evaluationCache != None:
+				self.cachedValue = evaluationCache.evaluate(self)
+			else:
+				self.cachedValue = self.evaluateUncached()
+		
+		return self.cachedValue
+		
+	#---------------------------------------------------------------------------
+	#	evaluateUncached()
+	#
+	#	evaluate() without the cache. The lookup tables only cover 5 to 7
+	#	different cards, anything else (including hands with the same card in
+	#	twice) is always counted out
+	#---------------------------------------------------------------------------
+	def evaluateUncached(self):
+		
+		if engine == TABLE_ENGINE and 5 <= len(self.cards) <= 7 and not repeatsCards(self.cards):
+			return evaluateTable(self.cards)
+		
+		return self.evaluateCounts()
+		
+	#---------------------------------------------------------------------------
+	#	score()
+	#
+	#	Same as evaluate() but packed into a single integer (see packScore()),
+	#	where a bigger score is a better hand
+	#---------------------------------------------------------------------------
+	def score(self):
+		
+		if self.cachedScore is None:
+			cards = self.cardList
+			if (engine == TABLE_ENGINE and evaluationCache is None and
+				self.cachedValue is None and 5 <= len(cards) <= 7 and not repeatsCards(cards)):
+				self.cachedScore = scoreTable(cards)
+			else:
+				self.cachedScore = packScore(self.evaluate())
+		
+		return self.cachedScore
+		
+	#---------------------------------------------------------------------------
+	#	category()
+	#
+	#	The hand's category, HIGH_CARD to STRAIGHT_FLUSH
+	#---------------------------------------------------------------------------
+	def category(self):
+		return scoreCategory(self.score())
+		
+	#---------------------------------------------------------------------------
+	#	bestFive()
+	#
+	#	The five cards that make the hand, most important first (e.g. the three
+	#	of a full house, then the pair, or the kickers from highest to lowest)
+	#---------------------------------------------------------------------------
+	def bestFive(self):
+		
+		if self.cachedBestFive == None:
+			self.cachedBestFive = bestFiveCards(self.cards, self.evaluate())
+			
+		return self.cachedBestFive
+		
+	#---------------------------------------------------------------------------
+	#	evaluateCounts()
+	#
+	#	Evaluates the hand directly from its cards, works for any number of
+	#	cards (at least 5) including repeats
+	#---------------------------------------------------------------------------
+	def evaluateCounts(self):
+		
 		#---------------------------------------------------------------------------
 		#	Algorithm:
 		#
@@ -46,42 +168,88 @@ class Hand():
 		#
 		#	All cards are stored by rank, which then uses tuple comparison to determine
 		#	the greatest value
+		#
+		#	The cards are only looked at once: rank counts, suit counts and a bitmask
+		#	of the ranks present are built up front, and every category is worked out
+		#	from those. The category functions below give the same answers but each
+		#	regroups the cards from scratch, so they're only used on their own.
 		#---------------------------------------------------------------------------
 		
-		cardsInStraightFlush = self.straightFlush()
-		if cardsInStraightFlush != None:
-			return (8, cardsInStraightFlush[0], 0, 0, 0, 0)
+		counts = [0] * 15
+		suitCounts = [0, 0, 0, 0]
+		rankMask = 0
+		for c in self.cards:
+			counts[c.rank] += 1
+			suitCounts[c.suitIndex] += 1
+			rankMask |= 1 << c.rank
 		
-		cardsInFours = self.fourOfAKind()
-		if cardsInFours != None:
-			return (7, cardsInFours[0], cardsInFours[1], 0, 0, 0)
+		#Ranks from high to low, repeated as many times as they appear
+		ordered = [c.rank for c in self.cards]
+		ordered.sort(reverse = True)
 		
-		cardsInFullHouse = self.fullHouse()
-		if cardsInFullHouse != None:
-			return (6, cardsInFullHouse[0], cardsInFullHouse[1], 0, 0, 0)
+		#Highest rank held at least 4, 3 and 2 times
+		fours = threes = twos = 0
+		for r in RANKS_HIGH_TO_LOW:
+			if counts[r] >= 2:
+				if not twos:
+					twos = r
+				if counts[r] >= 3:
+					if not threes:
+						threes = r
+					if counts[r] >= 4:
+						fours = r
+						break
 		
-		cardsInFlush = self.flush()
-		if cardsInFlush != None:
-			return (5, cardsInFlush[0], cardsInFlush[1], cardsInFlush[2], cardsInFlush[3], cardsInFlush[4])
+		#Flushes and straight flushes only need looking at if a suit has 5 cards
+		flushOrder = None
+		bestStraightFlush = 0
+		if max(suitCounts) >= 5:
+			for s in range(4):
+				if suitCounts[s] >= 5:
+					suited = [c.rank for c in self.cards if c.suitIndex == s]
+					suited.sort(reverse = True)
+					
+					suitedMask = 0
+					for r in suited:
+						suitedMask |= 1 << r
+					bestStraightFlush = max(bestStraightFlush, straightHigh(suitedMask))
+					
+					if flushOrder == None or suited[:5] > flushOrder:
+						flushOrder = suited[:5]
 		
-		cardsInStraight = self.straight()
-		if cardsInStraight != None:
-			return (4, cardsInStraight[0], 0, 0, 0, 0)
+		if bestStraightFlush:
+			return (8, bestStraightFlush, 0, 0, 0, 0)
 		
-		cardsInThrees = self.threeOfAKind()
-		if cardsInThrees != None:
-			return (3, cardsInThrees[0], cardsInThrees[1], cardsInThrees[2], 0, 0)
-			
-		cardsInTwoPairs = self.twoPairs()
-		if cardsInTwoPairs != None:
-			return (2, cardsInTwoPairs[0], cardsInTwoPairs[1], cardsInTwoPairs[2], 0, 0)
-			
-		cardsInPair = self.pair()
-		if cardsInPair != None:
-			return (1, cardsInPair[0], cardsInPair[1], cardsInPair[2], cardsInPair[3], 0)
+		if fours:
+			kickers = removeRank(ordered, fours, 4)
+			return (7, fours, kickers[0], 0, 0, 0)
+		
+		if threes:
+			pairRank = highestPair(removeRank(ordered, threes, 3))
+			if pairRank:
+				return (6, threes, pairRank, 0, 0, 0)
+		
+		if flushOrder != None:
+			return (5, flushOrder[0], flushOrder[1], flushOrder[2], flushOrder[3], flushOrder[4])
+		
+		straight = straightHigh(rankMask)
+		if straight:
+			return (4, straight, 0, 0, 0, 0)
+		
+		if threes:
+			kickers = removeRank(ordered, threes, 3)
+			return (3, threes, kickers[0], kickers[1], 0, 0)
+		
+		if twos:
+			kickers = removeRank(ordered, twos, 2)
+			pairRank = highestPair(kickers)
+			if pairRank:
+				kickers = removeRank(kickers, pairRank, 2)
+				return (2, twos, pairRank, kickers[0], 0, 0)
 			
-		cardsInHighCard = self.highCard()
-		return (0, cardsInHighCard[0], cardsInHighCard[1], cardsInHighCard[2], cardsInHighCard[3], cardsInHighCard[4])
+			return (1, twos, kickers[0], kickers[1], kickers[2], 0)
+		
+		return (0, ordered[0], ordered[1], ordered[2], ordered[3], ordered[4])
 		
 	#--------------------------------------------------------------------------
 	#	straightFlush()
@@ -274,15 +442,15 @@ class Hand():
 		if theCards == None:
 			theCards = self.cards
 			
-		groups = {card.Card.DIAMONDS:[],
-				  card.Card.HEARTS:[],
-				  card.Card.CLUBS:[],
-				  card.Card.SPADES:[]}
+		groups = [[], [], [], []]
 				
 		for c in theCards:
-			groups[c.suit].append(c)
+			groups[c.suitIndex].append(c)
 			
-		return groups
+		return {card.Card.HEARTS:groups[0],
+				card.Card.DIAMONDS:groups[1],
+				card.Card.SPADES:groups[2],
+				card.Card.CLUBS:groups[3]}
 		
 	#--------------------------------------------------------------------------
 	#	groupByRank()
@@ -302,7 +470,7 @@ class Hand():
 				  11:[], 12:[], 13:[], 14:[]}
 
 		for c in theCards:
-			rank = c.getRank()
+			rank = c.rank
 			groups[rank].append(c)
 			
 			#Ace is both a high and a low card
@@ -315,105 +483,236 @@ class Hand():
 	#	handName()
 	#
 	#	Evaluates the hand and returns a string with the name of the hand for
-	#	display purposes.
+	#	display purposes, see scoreName()
 	#
 	#--------------------------------------------------------------------------	
 	def handName(self):
+		return scoreName(self.score())
+	
+	#--------------------------------------------------------------------------
+	#	getRankStringPlural(), getRankString()
+	#
+	#	Same as rankStringPlural() and rankString()
+	#--------------------------------------------------------------------------			
+	def getRankStringPlural(self, rank):
+		return rankStringPlural(rank)
 		
-		text = "Nothing."
-		ranking = self.evaluate()
-		if ranking[0] == 8:
-			if ranking[1] == 14:
-				text = "royal flush!"
-			else:
-				text = self.getRankString(ranking[1])+"-high straight flush."
-			
-		elif ranking[0] == 7:
-			text = "four "+self.getRankStringPlural(ranking[1])+"."
+	def getRankString(self, rank):
+		return rankString(rank)
 		
-		elif ranking[0] == 6:
-			text = self.getRankStringPlural(ranking[1])+" full of "+self.getRankStringPlural(ranking[2])+"."
+							
+#---------------------------------------------------------------------------
+#	HandState Class
+#
+#	A hand being built up card by card, for when cards arrive in order (pocket,
+#	flop, turn, river) and many hands share the same first cards. Only the
+#	table engine's running sums are kept, so adding a card is a couple of
+#	integer operations. add() returns a new state and leaves the old one as it
+#	was, so a state for a shared prefix can be extended many different ways:
+#
+#		flop = HandState(pocket + flopCards)
+#		for turn in ...:
+#			turned = flop.add(turn)
+#			for river in ...:
+#				score = turned.scoreWith(river)
+#
+#	Scores are only defined once the state holds 5 to 7 different cards
+#---------------------------------------------------------------------------
+class HandState(object):
+	
+	__slots__ = ("total", "suitedRanks", "numCards")
+	
+	#---------------------------------------------------------------------------
+	#	Constructor
+	#
+	#	Optionally given the cards to start with
+	#---------------------------------------------------------------------------
+	def __init__(self, cards = []):
 		
-		elif ranking[0] == 5:
-			text = "flush."
+		self.total = 0
+		self.suitedRanks = 0
+		self.numCards = 0
 		
-		elif ranking[0] == 4:
-			text = self.getRankString(ranking[1])+"-high straight."
+		for c in cards:
+			self.total += CARD_KEYS[c.id]
+			self.suitedRanks |= SUITED_RANK_BITS[c.id]
+			self.numCards += 1
+	
+	#---------------------------------------------------------------------------
+	#	add(c), addAll(cards)
+	#
+	#	Return a new state with the card(s) added
+	#---------------------------------------------------------------------------
+	def add(self, c):
 		
-		elif ranking[0] == 3:
-			text = "three "+self.getRankStringPlural(ranking[1])+"."
+		state = HandState()
+		state.total = self.total + CARD_KEYS[c.id]
+		state.suitedRanks = self.suitedRanks | SUITED_RANK_BITS[c.id]
+		state.numCards = self.numCards + 1
+		return state
 		
-		elif ranking[0] == 2:
-			text = "a pair of "+self.getRankStringPlural(ranking[1])+" and a pair of "+self.getRankStringPlural(ranking[2])+"."
+	def addAll(self, cards):
 		
-		elif ranking[0] == 1:
-			text = "a pair of "+self.getRankStringPlural(ranking[1])+"."
+		state = self
+		for c in cards:
+			state = state.add(c)
+		return state
+	
+	#---------------------------------------------------------------------------
+	#	score(), scoreWith(c)
+	#
+	#	The packed score of the cards so far, or of the cards so far plus one
+	#	more (without making a new state)
+	#---------------------------------------------------------------------------
+	def score(self):
+		return scoreKeys(self.total, self.suitedRanks, self.numCards)
 		
-		elif ranking[0] == 0:
-			text = self.getRankString(ranking[1])+" high."
+	def scoreWith(self, c):
+		return scoreKeys(self.total + CARD_KEYS[c.id], self.suitedRanks | SUITED_RANK_BITS[c.id], self.numCards + 1)
+	
+	#---------------------------------------------------------------------------
+	#	evaluate()
+	#
+	#	Same as Hand.evaluate() for the cards so far
+	#---------------------------------------------------------------------------
+	def evaluate(self):
+		return unpackScore(self.score())
+	
+	def __len__(self):
+		return self.numCards
+	
+#---------------------------------------------------------------------------
+#	EvaluationCache Class
+#
+#	Remembers the evaluate() results of the last maxSize different sets of
+#	cards, and forgets the least recently used one when it's full. Hands are
+#	keyed by the CardSet mask of their cards, so the order the cards come in
+#	doesn't matter. hits and misses count how often a result was found or
+#	had to be worked out. Installed with setCache()
+#
+#	A lookup costs about as much as two table engine evaluations, so this
+#	pays off with the counts engine or hands of more than 7 cards
+#---------------------------------------------------------------------------
+class EvaluationCache(object):
+	
+	#---------------------------------------------------------------------------
+	#	Constructor
+	#---------------------------------------------------------------------------
+	def __init__(self, maxSize = 100000):
 		
-		else:
-			text = "nothing."
-			
-		return text
+		assert maxSize > 0
+		
+		self.maxSize = maxSize
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
 	
-	#--------------------------------------------------------------------------
-	#	getRankStringPlural()
+	#---------------------------------------------------------------------------
+	#	evaluate(h)
 	#
-	#	Pluralizes the result from getRankString()
-	#--------------------------------------------------------------------------			
-	def getRankStringPlural(self, rank):
-		if rank != 6:
-			return self.getRankString(rank)+"s"
-		else:
-			return self.getRankString(rank)+"es"
+	#	Returns h.evaluate(), from the cache if it's there. Hands with the same
+	#	card in twice don't fit a CardSet key, they're counted out every time
+	#---------------------------------------------------------------------------
+	def evaluate(self, h):
 		
-	#--------------------------------------------------------------------------
-	#	getRankString()
+		mask = 0
+		bits = 0
+		for c in h.cards:
+			bit = 1 << c.id
+			mask |= bit
+			bits += bit
+		
+		if mask != bits:
+			return h.evaluateCounts()
+		
+		entries = self.entries
+		if mask in entries:
+			#Move it to the most recently used end
+			value = entries.pop(mask)
+			entries[mask] = value
+			self.hits += 1
+			return value
+		
+		self.misses += 1
+		value = h.evaluateUncached()
+		entries[mask] = value
+		if len(entries) > self.maxSize:
+			entries.popitem(last = False)
+			
+		return value
+	
+	#---------------------------------------------------------------------------
+	#	hitRate()
 	#
-	#	Given a number between 1 and 14, returns a string describing the rank
+	#	Fraction of lookups that were found in the cache
+	#---------------------------------------------------------------------------
+	def hitRate(self):
+		
+		if self.hits + self.misses == 0:
+			return 0.0
+		
+		return float(self.hits) / (self.hits + self.misses)
+	
+	#---------------------------------------------------------------------------
+	#	clear()
 	#
-	#--------------------------------------------------------------------------			
-	def getRankString(self, rank):
-		if rank == 1:
-			rankStr = "ace"
-		elif rank == 2:
-			rankStr = "two"
-		elif rank == 3:
-			rankStr = "three"
-		elif rank == 4:
-			rankStr = "four"
-		elif rank == 5:
-			rankStr = "five"
-		elif rank == 6:
-			rankStr = "six"
-		elif rank == 7:
-			rankStr = "seven"
-		elif rank == 8:
-			rankStr = "eight"
-		elif rank == 9:
-			rankStr = "nine"
-		elif rank == 10:
-			rankStr = "ten"
-		elif rank == 11:
-			rankStr = "jack"
-		elif rank == 12:
-			rankStr = "queen"
-		elif rank == 13:
-			rankStr = "king"
-		elif rank == 14:
-			rankStr = "ace"
-		else:
-			rankStr = "?"
+	#	Empties the cache and resets the counters
+	#---------------------------------------------------------------------------
+	def clear(self):
 		
-		return rankStr
+		self.entries.clear()
+		self.hits = 0
+		self.misses = 0
 		
-							
+	def __len__(self):
+		return len(self.entries)
+	
 #--------------------------------------------------------------------------
 #	Class Functions 
 #--------------------------------------------------------------------------	
 
 
+#--------------------------------------------------------------------------
+#	straightHigh()
+#
+#	Given a bitmask of ranks (bit r set for rank r), returns the top card of
+#	the highest straight in it, or 0 if there's none. Aces count low too.
+#--------------------------------------------------------------------------
+def straightHigh(rankMask):
+	
+	#Copy the ace down to the 1 position
+	rankMask |= (rankMask >> 13) & 2
+	
+	#Bit r survives only if ranks r to r + 4 are all there
+	runs = rankMask & (rankMask >> 1) & (rankMask >> 2) & (rankMask >> 3) & (rankMask >> 4)
+	if runs:
+		return runs.bit_length() + 3
+	
+	return 0
+
+#--------------------------------------------------------------------------
+#	removeRank()
+#
+#	Given a high-to-low list of ranks, returns a copy with n of the given
+#	rank taken out
+#--------------------------------------------------------------------------
+def removeRank(ordered, rank, n):
+	i = ordered.index(rank)
+	return ordered[:i] + ordered[i + n:]
+
+#--------------------------------------------------------------------------
+#	highestPair()
+#
+#	Given a high-to-low list of ranks, returns the highest rank that appears
+#	at least twice, or 0 if there's none
+#--------------------------------------------------------------------------
+def highestPair(ordered):
+	for i in range(len(ordered) - 1):
+		if ordered[i] == ordered[i + 1]:
+			return ordered[i]
+	
+	return 0
+
 #--------------------------------------------------------------------------
 #	Winner()
 #
@@ -421,9 +720,9 @@ class Hand():
 #--------------------------------------------------------------------------
 def winner(hands):
 	bestHand = [-1]
-	bestScore = (-1,-1,-1,-1,-1,-1)
+	bestScore = -1
 	for h in hands:
-		score = h.evaluate()
+		score = h.score()
 		if score > bestScore:
 			bestScore = score
 			bestHand = [h.id]
@@ -431,6 +730,559 @@ def winner(hands):
 			bestHand.append(h.id)
 	
 	return bestHand
+
+#--------------------------------------------------------------------------
+#	showdown()
+#
+#	Works out a showdown between pockets that share the same community cards.
+#	The board is only gone through once, as a HandState, and each pocket's
+#	cards are added to its sums. If no suit has 3 cards on the board nobody
+#	can have a flush, so those checks are skipped. Returns (winners, ranking, scores): the ids of the best
+#	hand(s), every id grouped with those of equal hands, best first, and the
+#	packed score of each id's hand, e.g.
+#
+#		showdown(board, [p1, p2, p3]) -> ([2], [[2], [0, 1]], {0: ..., 1: ..., 2: ...})
+#
+#	if the third pocket wins and the other two tie. ids are the pockets'
+#	positions in the list unless given
+#--------------------------------------------------------------------------
+def showdown(board, pockets, ids = None):
+	
+	if ids == None:
+		ids = range(len(pockets))
+		
+	assert len(ids) == len(pockets) > 0
+	
+	if NONFLUSH_SLOTS is None:
+		buildTables()
+		
+	boardState = HandState(board)
+	flushPossible = ((boardState.total & 0xFFFF) + 0x5555) & 0x8888
+	
+	byScore = {}
+	scores = {}
+	for ID, pocket in zip(ids, pockets):
+		
+		numCards = boardState.numCards + len(pocket)
+		assert 5 <= numCards <= 7
+		
+		total = boardState.total
+		for c in pocket:
+			total += CARD_KEYS[c.id]
+			
+		if flushPossible:
+			suitedRanks = boardState.suitedRanks
+			for c in pocket:
+				suitedRanks |= SUITED_RANK_BITS[c.id]
+			score = scoreKeys(total, suitedRanks, numCards)
+		else:
+			key = (total >> 16) * 8 + numCards
+			score = NONFLUSH_SLOTS[(key + NONFLUSH_BUCKETS[key % NUM_BUCKETS]) % NUM_SLOTS]
+			
+		byScore.setdefault(score, []).append(ID)
+		scores[ID] = score
+	
+	ranking = [byScore[score] for score in sorted(byScore, reverse = True)]
+	return ranking[0], ranking, scores
+	
+#--------------------------------------------------------------------------
+#	setEngine()
+#
+#	Picks how Hand.evaluate() (and so winner()) works out hands:
+#
+#	COUNTS_ENGINE counts ranks and suits for every hand
+#	TABLE_ENGINE looks 5 to 7 card hands up in precomputed tables, which are
+#	built the first time they're needed
+#
+#	Both give exactly the same results
+#--------------------------------------------------------------------------
+def setEngine(name):
+	global engine
+	
+	assert name in ENGINES, "Unknown engine " + str(name)
+	engine = name
+	
+#--------------------------------------------------------------------------
+#	bestFiveCards()
+#
+#	Given some cards and their evaluate() value, picks out the five cards that
+#	make that value: the value says which ranks are needed in which order,
+#	flushes also need them to be the same suit
+#--------------------------------------------------------------------------
+def bestFiveCards(cards, value):
+	
+	category = value[0]
+	if category == STRAIGHT or category == STRAIGHT_FLUSH:
+		ranks = [value[1] - i for i in range(5)]
+		if ranks[4] == 1:
+			ranks[4] = 14
+	elif category == FOUR_OF_A_KIND:
+		ranks = [value[1]] * 4 + [value[2]]
+	elif category == FULL_HOUSE:
+		ranks = [value[1]] * 3 + [value[2]] * 2
+	elif category == THREE_OF_A_KIND:
+		ranks = [value[1]] * 3 + [value[2], value[3]]
+	elif category == TWO_PAIRS:
+		ranks = [value[1]] * 2 + [value[2]] * 2 + [value[3]]
+	elif category == PAIR:
+		ranks = [value[1]] * 2 + [value[2], value[3], value[4]]
+	else:
+		ranks = list(value[1:])
+	
+	if category == FLUSH or category == STRAIGHT_FLUSH:
+		suits = range(4)
+	else:
+		suits = [None]
+	
+	for suit in suits:
+		pool = [c for c in cards if suit == None or c.suitIndex == suit]
+		best = []
+		for r in ranks:
+			for c in pool:
+				if c.rank == r:
+					best.append(c)
+					pool.remove(c)
+					break
+			else:
+				break
+				
+		if len(best) == 5:
+			return best
+	
+	assert False, "Cards don't make " + str(value)
+	
+#--------------------------------------------------------------------------
+#	setCache()
+#
+#	Puts an EvaluationCache holding up to maxSize hands in front of
+#	Hand.evaluate() and Hand.score(), and returns it so its counters can be
+#	read. setCache(None) turns caching off again
+#--------------------------------------------------------------------------
+def setCache(maxSize):
+	global evaluationCache
+	
+	if maxSize == None:
+		evaluationCache = None
+	else:
+		evaluationCache = EvaluationCache(maxSize)
+		
+	return evaluationCache
+	
+#--------------------------------------------------------------------------
+#	repeatsCards()
+#
+#	True if the same card is in the list more than once. The lookup tables
+#	can't score those hands: the repeated card's key is added twice and the
+#	sum doesn't belong to any real hand. Cards are shared instances (see
+#	card.Card), so a set of them drops exactly the repeats
+#--------------------------------------------------------------------------
+def repeatsCards(cards):
+	return len(set(cards)) != len(cards)
+	
+#--------------------------------------------------------------------------
+#	evaluateTable()
+#
+#	Evaluates a list of 5 to 7 different cards with the lookup tables. Each
+#	card adds its CARD_KEYS entry, which holds a rank key in the high bits and
+#	a count in its suit's nibble in the low 16 bits. If no nibble reaches 5
+#	there's no flush, and the rank keys add up to a unique value for the
+#	multiset of ranks, which is looked up with nonFlushScore(). Otherwise the
+#	flush suit's ranks index FLUSH_SCORES;
+#	with 7 cards or fewer a flush can't be beaten by anything but a straight
+#	flush, which that table already knows about.
+#
+#	scoreTable() returns the packed score, evaluateTable() the usual tuple
+#--------------------------------------------------------------------------
+def evaluateTable(cards):
+	return unpackScore(scoreTable(cards))
+
+def scoreTable(cards):
+	
+	if NONFLUSH_SLOTS is None:
+		buildTables()
+	
+	total = 0
+	for c in cards:
+		total += CARD_KEYS[c.id]
+	
+	flushFlags = ((total & 0xFFFF) + 0x3333) & 0x8888
+	if flushFlags:
+		flushSuit = flushFlags.bit_length() / 4 - 1
+		suitedRanks = 0
+		for c in cards:
+			if c.suitIndex == flushSuit:
+				suitedRanks |= 1 << (c.rank - 2)
+		
+		return FLUSH_SCORES[suitedRanks]
+	
+	key = (total >> 16) * 8 + len(cards)
+	return NONFLUSH_SLOTS[(key + NONFLUSH_BUCKETS[key % NUM_BUCKETS]) % NUM_SLOTS]
+	
+#--------------------------------------------------------------------------
+#	scoreKeys()
+#
+#	scoreTable() for running sums that are already worked out: the sum of the
+#	cards' CARD_KEYS, the OR of their SUITED_RANK_BITS and how many there are.
+#	Used by HandState
+#--------------------------------------------------------------------------
+def scoreKeys(total, suitedRanks, numCards):
+	
+	if NONFLUSH_SLOTS is None:
+		buildTables()
+	
+	flushFlags = ((total & 0xFFFF) + 0x3333) & 0x8888
+	if flushFlags:
+		flushSuit = flushFlags.bit_length() / 4 - 1
+		return FLUSH_SCORES[(suitedRanks >> (13 * flushSuit)) & 0x1FFF]
+	
+	key = (total >> 16) * 8 + numCards
+	return NONFLUSH_SLOTS[(key + NONFLUSH_BUCKETS[key % NUM_BUCKETS]) % NUM_SLOTS]
+	
+#--------------------------------------------------------------------------
+#	nonFlushScore()
+#
+#	The score of a hand with no flush from its key, the sum of its ranks'
+#	RANK_KEYS * 8 + the number of cards. The keys are hashed into the table
+#	with a displacement for each bucket (see hashKeys()) so it can be looked
+#	up straight from the mapped file. The hot paths do this lookup inline
+#--------------------------------------------------------------------------
+def nonFlushScore(key):
+	
+	if NONFLUSH_SLOTS is None:
+		buildTables()
+	
+	return NONFLUSH_SLOTS[(key + NONFLUSH_BUCKETS[key % NUM_BUCKETS]) % NUM_SLOTS]
+	
+#--------------------------------------------------------------------------
+#	buildTables()
+#
+#	Points NONFLUSH_BUCKETS, NONFLUSH_SLOTS and FLUSH_SCORES (and the NumPy
+#	arrays for scoreBatch(), if NumPy is there) at the sections of the hand
+#	rank table file. The file is made by computeTables() the first time it's
+#	needed and memory-mapped after that, see tables.py. Nothing is copied
+#	out of it, so every process using the tables shares the one copy in the
+#	page cache
+#--------------------------------------------------------------------------
+def buildTables():
+	
+	global NONFLUSH_BUCKETS, NONFLUSH_SLOTS, NUM_BUCKETS, NUM_SLOTS, FLUSH_SCORES
+	global BATCH_KEYS, BATCH_SCORES, FLUSH_SCORE_ARRAY
+	
+	sections = tables.loadTable("handRanks", computeTables, TABLE_VERSION)
+	
+	if numpy != None:
+		BATCH_KEYS = numpy.frombuffer(sections["keys"], dtype = numpy.intc)
+		BATCH_SCORES = numpy.frombuffer(sections["scores"], dtype = numpy.intc)
+		FLUSH_SCORE_ARRAY = numpy.frombuffer(sections["flush"], dtype = numpy.intc)
+	
+	FLUSH_SCORES = sections["flush"]
+	NONFLUSH_BUCKETS = sections["buckets"]
+	NUM_BUCKETS = len(NONFLUSH_BUCKETS)
+	NUM_SLOTS = len(sections["slots"])
+	
+	#Set last, it's what the lookups check for
+	NONFLUSH_SLOTS = sections["slots"]
+	
+#--------------------------------------------------------------------------
+#	computeTables()
+#
+#	Works out the hand rank table by evaluating one hand for every rank
+#	multiset and every set of suited ranks with the counts engine. Returns
+#	the table file sections: the sorted non-flush keys and their scores (for
+#	scoreBatch()), the same hashed for nonFlushScore(), and FLUSH_SCORES with
+#	0 where there's no flush
+#--------------------------------------------------------------------------
+def computeTables():
+	
+	nonFlush = {}
+	for numCards in range(5, 8):
+		for ranks in rankMultisets(numCards, 4):
+			
+			#Dealing the suits round-robin never gives 5 of one suit or the same card twice
+			theCards = [card.cardID(i % 4, ranks[i]) for i in range(numCards)]
+			theCards = [card.fromID(i) for i in theCards]
+			
+			key = sum([RANK_KEYS[r - 2] for r in ranks])
+			nonFlush[key * 8 + numCards] = packScore(Hand(theCards).evaluateCounts())
+	
+	flush = [0] * (1 << 13)
+	for suitedRanks in range(1 << 13):
+		ranks = [r for r in range(2, 15) if suitedRanks & (1 << (r - 2))]
+		if 5 <= len(ranks) <= 7:
+			theCards = [card.fromID(card.cardID(0, r)) for r in ranks]
+			flush[suitedRanks] = packScore(Hand(theCards).evaluateCounts())
+	
+	keys = sorted(nonFlush.keys())
+	buckets, slots = hashKeys(nonFlush, len(keys) / 3, len(keys) * 11 / 10)
+	
+	return [("keys", keys), ("scores", [nonFlush[k] for k in keys]), ("flush", flush),
+			("buckets", buckets), ("slots", slots)]
+	
+#--------------------------------------------------------------------------
+#	hashKeys()
+#
+#	Lays the values of a dict with int keys out in numSlots slots, so that
+#	key k's value is in slots[(k + buckets[k % numBuckets]) % numSlots] with
+#	no two keys sharing a slot. Each bucket of keys gets the smallest
+#	displacement that moves all of them into free slots, biggest buckets
+#	first while there's the most room. Returns (buckets, slots), with 0 in
+#	the unused slots
+#--------------------------------------------------------------------------
+def hashKeys(values, numBuckets, numSlots):
+	
+	keysInBucket = [[] for i in range(numBuckets)]
+	for k in values:
+		keysInBucket[k % numBuckets].append(k)
+	
+	buckets = [0] * numBuckets
+	slots = [0] * numSlots
+	used = [False] * numSlots
+	
+	for b in sorted(range(numBuckets), key = lambda b: -len(keysInBucket[b])):
+		keys = keysInBucket[b]
+		if not keys:
+			break
+		
+		displacement = 0
+		while True:
+			positions = [(k + displacement) % numSlots for k in keys]
+			if not any([used[i] for i in positions]) and len(set(positions)) == len(keys):
+				break
+			displacement += 1
+		
+		buckets[b] = displacement
+		for k, i in zip(keys, positions):
+			used[i] = True
+			slots[i] = values[k]
+	
+	return buckets, slots
+	
+#--------------------------------------------------------------------------
+#	scoreBatch()
+#
+#	Scores many hands in one go. Takes an (N, k) array of card ids, 5 <= k <= 7,
+#	with no card repeated in a row (e.g. rows of deck.shuffledDecks()), and
+#	returns an array of the N packed scores, the same as scoreTable() would give.
+#	Works just like scoreTable(), but on whole columns at a time: the card keys
+#	are summed across each row, the rank part is looked up with a binary search
+#	in the sorted table keys, and the rows with a flush are redone from
+#	FLUSH_SCORES.
+#	Needs NumPy.
+#--------------------------------------------------------------------------
+def scoreBatch(ids):
+	
+	assert numpy != None, "scoreBatch() requires NumPy"
+	
+	ids = numpy.asarray(ids)
+	assert ids.ndim == 2 and 5 <= ids.shape[1] <= 7
+	
+	if BATCH_KEYS is None:
+		buildTables()
+	
+	total = CARD_KEY_ARRAY[ids].sum(axis = 1)
+	keys = ((total >> 16) * 8 + ids.shape[1]).astype(BATCH_KEYS.dtype)
+	scores = BATCH_SCORES[numpy.searchsorted(BATCH_KEYS, keys)]
+	
+	flushFlags = ((total & 0xFFFF) + 0x3333) & 0x8888
+	flushRows = numpy.nonzero(flushFlags)[0]
+	
+	if len(flushRows):
+		flushFlags = flushFlags[flushRows]
+		flushSuit = (flushFlags > 0x8).astype(numpy.int64) + (flushFlags > 0x80) + (flushFlags > 0x800)
+		
+		flushIDs = ids[flushRows]
+		suited = (flushIDs % 4) == flushSuit[:, numpy.newaxis]
+		suitedRanks = (RANK_BIT_ARRAY[flushIDs // 4] * suited).sum(axis = 1)
+		scores[flushRows] = FLUSH_SCORE_ARRAY[suitedRanks]
+	
+	return scores
+	
+#--------------------------------------------------------------------------
+#	rankMultisets()
+#
+#	Generates every sorted list of numCards ranks with no rank used more
+#	than maxCopies times
+#--------------------------------------------------------------------------
+def rankMultisets(numCards, maxCopies, lowest = 2):
+	
+	if numCards == 0:
+		yield []
+		return
+	
+	for r in range(lowest, 15):
+		for rest in rankMultisets(numCards - 1, maxCopies, r):
+			if rest.count(r) < maxCopies:
+				yield [r] + rest
+
+#--------------------------------------------------------------------------
+#	packScore()
+#
+#	Packs a hand value tuple from evaluate() into one integer that sorts the
+#	same way. Each entry gets 4 bits, category first:
+#
+#		category << 20 | high1 << 16 | high2 << 12 | high3 << 8 | high4 << 4 | high5
+#
+#	so every score fits in 24 bits
+#--------------------------------------------------------------------------
+def packScore(value):
+	return (value[0] << 20) | (value[1] << 16) | (value[2] << 12) | (value[3] << 8) | (value[4] << 4) | value[5]
+
+#--------------------------------------------------------------------------
+#	unpackScore()
+#
+#	Turns a packed score back into the tuple evaluate() would give
+#--------------------------------------------------------------------------
+def unpackScore(score):
+	return (score >> 20, (score >> 16) & 15, (score >> 12) & 15, (score >> 8) & 15, (score >> 4) & 15, score & 15)
+
+#--------------------------------------------------------------------------
+#	scoreCategory(), scoreKickers()
+#
+#	The category (HIGH_CARD to STRAIGHT_FLUSH) and the five ranks after it
+#	from a packed score
+#--------------------------------------------------------------------------
+def scoreCategory(score):
+	return score >> 20
+
+def scoreKickers(score):
+	return unpackScore(score)[1:]
+	
+#--------------------------------------------------------------------------
+#	scoreName()
+#
+#	The name of the hand with a packed score, for display purposes. Works
+#	from the score alone, so a score that's already been worked out (say by
+#	showdown()) doesn't need evaluating again
+#--------------------------------------------------------------------------
+def scoreName(score):
+	
+	text = "Nothing."
+	category = scoreCategory(score)
+	ranking = scoreKickers(score)
+	if category == STRAIGHT_FLUSH:
+		if ranking[0] == 14:
+			text = "royal flush!"
+		else:
+			text = rankString(ranking[0])+"-high straight flush."
+		
+	elif category == FOUR_OF_A_KIND:
+		text = "four "+rankStringPlural(ranking[0])+"."
+	
+	elif category == FULL_HOUSE:
+		text = rankStringPlural(ranking[0])+" full of "+rankStringPlural(ranking[1])+"."
+	
+	elif category == FLUSH:
+		text = "flush."
+	
+	elif category == STRAIGHT:
+		text = rankString(ranking[0])+"-high straight."
+	
+	elif category == THREE_OF_A_KIND:
+		text = "three "+rankStringPlural(ranking[0])+"."
+	
+	elif category == TWO_PAIRS:
+		text = "a pair of "+rankStringPlural(ranking[0])+" and a pair of "+rankStringPlural(ranking[1])+"."
+	
+	elif category == PAIR:
+		text = "a pair of "+rankStringPlural(ranking[0])+"."
+	
+	elif category == HIGH_CARD:
+		text = rankString(ranking[0])+" high."
+	
+	else:
+		text = "nothing."
+		
+	return text
+	
+#--------------------------------------------------------------------------
+#	rankStringPlural()
+#
+#	Pluralizes the result from rankString()
+#--------------------------------------------------------------------------
+def rankStringPlural(rank):
+	if rank != 6:
+		return rankString(rank)+"s"
+	else:
+		return rankString(rank)+"es"
+	
+#--------------------------------------------------------------------------
+#	rankString()
+#
+#	Given a number between 1 and 14, returns a string describing the rank
+#--------------------------------------------------------------------------
+def rankString(rank):
+	if rank == 1:
+		rankStr = "ace"
+	elif rank == 2:
+		rankStr = "two"
+	elif rank == 3:
+		rankStr = "three"
+	elif rank == 4:
+		rankStr = "four"
+	elif rank == 5:
+		rankStr = "five"
+	elif rank == 6:
+		rankStr = "six"
+	elif rank == 7:
+		rankStr = "seven"
+	elif rank == 8:
+		rankStr = "eight"
+	elif rank == 9:
+		rankStr = "nine"
+	elif rank == 10:
+		rankStr = "ten"
+	elif rank == 11:
+		rankStr = "jack"
+	elif rank == 12:
+		rankStr = "queen"
+	elif rank == 13:
+		rankStr = "king"
+	elif rank == 14:
+		rankStr = "ace"
+	else:
+		rankStr = "?"
+	
+	return rankStr
+	
+	
+#========================================
+#	LOOKUP TABLES
+#========================================
+
+#Additive key for each rank, 2 to A. The sum over any 5, 6 or 7 ranks (at
+#most 4 of each) is different for every multiset with the same number of cards
+RANK_KEYS = [0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181]
+
+#Per card id: rank key << 16, plus 1 in the nibble for the card's suit
+CARD_KEYS = [(RANK_KEYS[card.RANK_OF_ID[i] - 2] << 16) | (1 << (4 * card.SUIT_OF_ID[i])) for i in range(52)]
+
+#Per card id: the card's flush bit (rank - 2) in its suit's 13 bits
+SUITED_RANK_BITS = [1 << (13 * card.SUIT_OF_ID[i] + card.RANK_OF_ID[i] - 2) for i in range(52)]
+
+#Version of the hand rank table file, raise it whenever computeTables() changes
+TABLE_VERSION = 2
+
+#Set up by buildTables() as views of the mapped table file: the displacement
+#of each bucket and the hashed slots of the scores keyed by rank key sum * 8 +
+#number of cards (see nonFlushScore()), and the scores indexed by a 13-bit
+#mask of the ranks in a flush suit (0 where there's no flush)
+NONFLUSH_BUCKETS = None
+NONFLUSH_SLOTS = None
+NUM_BUCKETS = 0
+NUM_SLOTS = 0
+FLUSH_SCORES = None
+
+#NumPy arrays for scoreBatch(): CARD_KEYS, the flush bit for each rank
+#(indexed by rank - 2), the sorted non-flush keys and their scores, and
+#FLUSH_SCORES. The last three are views of the mapped table file, set up by
+#buildTables()
+if numpy != None:
+	CARD_KEY_ARRAY = numpy.array(CARD_KEYS, dtype = numpy.int64)
+	RANK_BIT_ARRAY = numpy.array([1 << r for r in range(13)], dtype = numpy.int32)
+	
+BATCH_KEYS = None
+BATCH_SCORES = None
+FLUSH_SCORE_ARRAY = None
 	
 	
 #========================================
@@ -755,5 +1607,221 @@ if __name__ == "__main__":
 	assert result[4] == 11
 	assert result[5] == 8		
 	
+	print "\tWheel"
+	W = Hand([card.Card("D", "A"), card.Card("D", "2"), card.Card("H", "3"), card.Card("D", "4"),card.Card("H", "5"),
+			 card.Card("C", "K"), card.Card("S", "K")])
+	
+	assert W.evaluate() == (4, 5, 0, 0, 0, 0)
+	
+	print "\tFull house over a flush"
+	FF = Hand([card.Card("H", "A"), card.Card("H", "K"), card.Card("H", "3"), card.Card("H", "2"),card.Card("H", "5"),
+			 card.Card("C", "3"), card.Card("S", "3"), card.Card("D", "A")])
+	
+	assert FF.evaluate() == (6, 3, 14, 0, 0, 0)
+	
+	print "Test complete."
+	
+	print "Testing table engine."
+	
+	import random
+	
+	for h in [SF, FK, FH, F, S, T, TP, P, HC, W, FF]:
+		assert h.evaluate() == h.evaluateCounts()
+	
+	values = set(list(NONFLUSH_SLOTS) + list(FLUSH_SCORES))
+	values.discard(0)
+	assert len(values) == 7462
+	
+	#Every non-flush key hashes to its own score
+	sections = tables.loadTable("handRanks", computeTables, TABLE_VERSION)
+	assert len(sections["keys"]) == 73775
+	for key, score in zip(sections["keys"], sections["scores"]):
+		assert nonFlushScore(key) == score
+	
+	buckets, slots = hashKeys(dict([(k, k * k) for k in range(0, 3000, 7)]), 50, 500)
+	for k in range(0, 3000, 7):
+		assert slots[(k + buckets[k % 50]) % 500] == k * k
+	
+	for i in range(20000):
+		h = Hand([card.fromID(c) for c in random.sample(range(52), random.randint(5, 7))])
+		assert evaluateTable(h.cards) == h.evaluateCounts()
+	
+	#The same card in twice can't be looked up, it's counted out instead
+	AH = card.Card("H", "A")
+	repeated = [AH, AH, AH, AH, card.Card("H", "5"), card.Card("H", "6"), card.Card("H", "7")]
+	assert repeatsCards(repeated) and not repeatsCards(FH.cards)
+	assert Hand(repeated).evaluate() == (7, 14, 7, 0, 0, 0)
+	assert Hand(repeated).score() == packScore((7, 14, 7, 0, 0, 0))
+	assert Hand(repeated[:5]).evaluate() == Hand(repeated[:5]).evaluateCounts()
+	
+	setEngine(COUNTS_ENGINE)
+	assert Hand(FH.cards).evaluate() == (6, 6, 13, 0, 0, 0)
+	setEngine(TABLE_ENGINE)
+	
+	print "Test complete."
+	
+	print "Testing scores."
+	
+	for h in [SF, FK, FH, F, S, T, TP, P, HC, W, FF]:
+		assert unpackScore(h.score()) == h.evaluate()
+		assert packScore(h.evaluate()) == h.score()
+		assert scoreCategory(h.score()) == h.evaluate()[0]
+	
+	ordered = [HC, P, TP, T, S, F, FH, FK, SF]
+	for i in range(len(ordered) - 1):
+		assert ordered[i].score() < ordered[i + 1].score()
+	
+	assert packScore((1, 5, 13, 12, 11, 0)) < packScore((1, 5, 14, 2, 2, 0)) < packScore((1, 6, 2, 2, 2, 0))
+	
+	SF.id = 1
+	F.id = 2
+	assert winner([F, SF]) == [1]
+	
+	setEngine(COUNTS_ENGINE)
+	assert Hand(FH.cards).score() == packScore((6, 6, 13, 0, 0, 0))
+	setEngine(TABLE_ENGINE)
+	
+	assert FK.handName() == "four kings."
+	assert W.handName() == "five-high straight."
+	
+	print "Test complete."
+	
+	if numpy != None:
+		print "Testing batch scores."
+		
+		for numCards in range(5, 8):
+			ids = numpy.array([random.sample(range(52), numCards) for i in range(5000)], dtype = numpy.uint8)
+			scores = scoreBatch(ids)
+			assert len(scores) == 5000
+			for i in range(len(ids)):
+				assert scores[i] == scoreTable([card.fromID(c) for c in ids[i]])
+		
+		assert scoreBatch([[c.id for c in SF.cards[:7]]])[0] == packScore((8, 6, 0, 0, 0, 0))
+		
+		print "Test complete."
+	
+	print "Testing hand states."
+	
+	for h in [SF, FK, FH, F, S, T, TP, P, HC, W, FF]:
+		if len(h.cards) <= 7:
+			assert HandState(h.cards).score() == h.score()
+			assert HandState(h.cards[:-1]).scoreWith(h.cards[-1]) == h.score()
+			assert HandState(h.cards[:2]).addAll(h.cards[2:]).evaluate() == h.evaluate()
+	
+	flop = HandState(SF.cards[:5])
+	turned = flop.add(SF.cards[5])
+	assert len(flop) == 5 and len(turned) == 6
+	assert flop.score() == scoreTable(SF.cards[:5])
+	assert turned.score() == scoreTable(SF.cards[:6])
+	
+	for i in range(2000):
+		cards = [card.fromID(c) for c in random.sample(range(52), 7)]
+		assert HandState(cards[:4]).add(cards[4]).add(cards[5]).scoreWith(cards[6]) == scoreTable(cards)
+	
+	print "Test complete."
+	
+	print "Testing evaluation cache."
+	
+	#Hands keep their own result, so use new ones to see the cache at work
+	cache = setCache(2)
+	assert Hand(FH.cards).evaluate() == FH.evaluateUncached()
+	assert (cache.hits, cache.misses) == (0, 1)
+	
+	#Same cards in another order
+	assert Hand(FH.cards[::-1]).evaluate() == FH.evaluateUncached()
+	assert (cache.hits, cache.misses) == (1, 1)
+	assert Hand(FH.cards).score() == packScore(FH.evaluateUncached())
+	assert cache.hits == 2
+	
+	Hand(F.cards).evaluate()
+	Hand(S.cards).evaluate()
+	assert len(cache) == 2
+	assert cache.misses == 3
+	
+	#F is now the least recently used, so it's the one to go
+	Hand(S.cards).evaluate()
+	Hand(T.cards).evaluate()
+	assert cache.hits == 3
+	Hand(S.cards).evaluate()
+	assert cache.hits == 4
+	Hand(F.cards).evaluate()
+	assert cache.misses == 5
+	assert cache.hitRate() == 4.0 / 9
+	
+	#Repeated cards skip the cache
+	h = Hand([card.Card("H", "A"), card.Card("H", "A"), card.Card("H", "3"), card.Card("S", "3"), card.Card("H", "5")])
+	assert h.evaluate() == (2, 14, 3, 5, 0, 0)
+	assert cache.hits + cache.misses == 9
+	
+	cache.clear()
+	assert len(cache) == 0 and cache.hits == 0
+	
+	assert setCache(None) == None
+	assert FH.evaluate() == (6, 6, 13, 0, 0, 0)
+	
+	print "Test complete."
+	
+	print "Testing cached results."
+	
+	h = Hand(FH.cards)
+	assert h.evaluate() is h.evaluate()
+	assert h.category() == FULL_HOUSE
+	assert [c.rank for c in h.bestFive()] == [6, 6, 6, 13, 13]
+	assert set(h.bestFive()) <= set(h.cards)
+	
+	#New cards mean a new evaluation
+	h.cards = SF.cards
+	assert h.category() == STRAIGHT_FLUSH
+	assert [c.rank for c in h.bestFive()] == [6, 5, 4, 3, 2]
+	assert [c.suit for c in h.bestFive()] == [card.Card.HEARTS] * 5
+	
+	assert [c.rank for c in W.bestFive()] == [5, 4, 3, 2, 14]
+	assert [c.rank for c in FK.bestFive()] == [13, 13, 13, 13, 6]
+	assert [c.rank for c in F.bestFive()] == [13, 8, 5, 3, 2]
+	assert [c.rank for c in TP.bestFive()] == [8, 8, 5, 5, 13]
+	assert [c.rank for c in HC.bestFive()] == [14, 13, 12, 11, 8]
+	
+	for i in range(2000):
+		h = Hand([card.fromID(c) for c in random.sample(range(52), 7)])
+		assert Hand(h.bestFive()).evaluate() == h.evaluate()
+	
+	print "Test complete."
+	
+	print "Testing showdowns."
+	
+	board = SF.cards[2:7]
+	winners, ranking, scores = showdown(board, [[card.Card("C", "A"), card.Card("D", "A")], SF.cards[:2], [card.Card("S", "K"), card.Card("D", "Q")]], ["a", "b", "c"])
+	assert winners == ["b"]
+	assert ranking == [["b"], ["a"], ["c"]]
+	assert scores["b"] == SF.score() and scoreName(scores["b"]) == SF.handName()
+	
+	for i in range(500):
+		numPlayers = random.randint(2, 12)
+		cards = [card.fromID(c) for c in random.sample(range(52), 5 + 2 * numPlayers)]
+		board = cards[:5]
+		pockets = [cards[5 + 2 * n:7 + 2 * n] for n in range(numPlayers)]
+		hands = [Hand(p + board, n) for n, p in enumerate(pockets)]
+		
+		winners, ranking, scores = showdown(board, pockets)
+		assert winners == winner(hands)
+		assert scores == dict([(n, hands[n].score()) for n in range(numPlayers)])
+		assert sorted(sum(ranking, [])) == range(numPlayers)
+		assert showdown(board[:3], pockets)[0] == winner([Hand(p + board[:3], n) for n, p in enumerate(pockets)])
+		for n in range(len(ranking) - 1):
+			assert hands[ranking[n][0]].score() > hands[ranking[n + 1][0]].score()
+	
+	print "Test complete."
+	
+	print "Testing helper functions."
+	
+	assert straightHigh(0) == 0
+	assert straightHigh((1 << 14) | (1 << 2) | (1 << 3) | (1 << 4) | (1 << 5)) == 5
+	assert straightHigh(sum([1 << r for r in range(6, 15)])) == 14
+	assert straightHigh((1 << 14) | (1 << 13) | (1 << 12) | (1 << 11) | (1 << 2)) == 0
+	
+	assert removeRank([14, 9, 9, 9, 3], 9, 2) == [14, 9, 3]
+	assert highestPair([14, 9, 9, 3, 3]) == 9
+	assert highestPair([14, 9, 3]) == 0
+	
 	print "Test complete."				
 	
\ No newline at end of file
@@ -12,7 +12,13 @@
 #
 #---------------------------------------------------------------------------
 
-import decision
+import decision, card
+
+#The pocket shown for players whose cards are hidden: a pair of the unknown
+#card. It's kept read-only and getInfo() hands out a list copy of it, so a
+#hidden pocket is the same kind of sequence as a real one (pocket + board
+#works on both) and no viewer can change it for the others
+HIDDEN_POCKET = (card.UNKNOWN_CARD, card.UNKNOWN_CARD)
 
 #---------------------------------------------------------------------------
 #	Player class
@@ -40,11 +46,17 @@ class Player():
 	#---------------------------------------------------------------------------
 	#	getInfo()
 	#
-	#	Returns a set of player info for use in the game state
+	#	Returns a set of player info for use in the game state. If hidePocket
+	#	is true the pocket cards are replaced with a list of HIDDEN_POCKET
 	#---------------------------------------------------------------------------
-	def getInfo(self):
+	def getInfo(self, hidePocket = False):
+		
+		if hidePocket:
+			pocket = list(HIDDEN_POCKET)
+		else:
+			pocket = self.pocket
 		
-		return PlayerInfo(self.id, self.name, self.isInGame, self.isInHand, self.bank, self.pot, self.pocket, 
+		return PlayerInfo(self.id, self.name, self.isInGame, self.isInHand, self.bank, self.pot, pocket, 
 						  self.isDealer, self.isActive, self.miscInfo)
 
 	#---------------------------------------------------------------------------
@@ -149,4 +161,18 @@ class PlayerInfo():
 #	TESTS
 #========================================	
 if __name__ == '__main__':	
-	pass	
\ No newline at end of file
+
+	print "Testing hidden pockets."
+	
+	p = Player(0, "Test", 100)
+	p.pocket = [card.Card("Hearts", "A"), card.Card("Spades", "K")]
+	
+	assert p.getInfo().pocket is p.pocket
+	hidden = p.getInfo(hidePocket = True).pocket
+	assert hidden == list(HIDDEN_POCKET)
+	assert type(hidden) == type(p.pocket)
+	assert len(hidden + [card.Card("Clubs", "2")]) == 3
+	assert p.getInfo(hidePocket = True).isValid()
+	assert not HIDDEN_POCKET[0].isKnown()
+	
+	print "Test complete."	
\ No newline at end of file
@@ -0,0 +1,377 @@
+#---------------------------------------------------------------------------
+#	ranges.py
+#
+#	Description:
+#
+#	Hand ranges: every pocket a player could be holding, each with a weight
+#	for how likely it is. A range is stored as an array with a weight for
+#	each of the 1326 possible pockets (COMBOS), and can be written in the
+#	usual shorthand, e.g.
+#
+#		parseRange("TT+, AKs, KQo, 76s-54s, AhQh:0.5")
+#
+#	rangeEquity() works out how one range does against another (or a single
+#	pocket against a range) with any known community cards, leaving out the
+#	pockets that share a card with each other or the board.
+#
+#---------------------------------------------------------------------------
+
+import itertools, re, time
+from math import sqrt
+import card, deck, hand, calculate, streams
+
+#NumPy is optional for parseRange(), which gives a list without it, but
+#rangeEquity() needs it
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+#========================================
+#	LOOKUP TABLES
+#========================================
+
+#Every pocket as a pair of card ids, lowest first, and its index in COMBOS
+COMBOS = list(itertools.combinations(range(52), 2))
+COMBO_INDEX = dict([(COMBOS[i], i) for i in range(len(COMBOS))])
+
+#The card ids of the pockets of each rank with suits and without
+SUITED_COMBOS = {}
+OFFSUIT_COMBOS = {}
+PAIR_COMBOS = {}
+for high in range(2, 15):
+	for low in range(2, high + 1):
+		pockets = [COMBO_INDEX[tuple(sorted((first, second)))]
+				   for first in range(52) if card.RANK_OF_ID[first] == high
+				   for second in range(52) if card.RANK_OF_ID[second] == low and second != first]
+		pockets = sorted(set(pockets))
+
+		if high == low:
+			PAIR_COMBOS[high] = pockets
+		else:
+			SUITED_COMBOS[(high, low)] = [i for i in pockets if card.SUIT_OF_ID[COMBOS[i][0]] == card.SUIT_OF_ID[COMBOS[i][1]]]
+			OFFSUIT_COMBOS[(high, low)] = [i for i in pockets if card.SUIT_OF_ID[COMBOS[i][0]] != card.SUIT_OF_ID[COMBOS[i][1]]]
+
+if numpy != None:
+	COMBO_ARRAY = numpy.array(COMBOS, dtype = numpy.uint8)
+	COMBO_MASKS = numpy.array([(1 << a) | (1 << b) for a, b in COMBOS], dtype = numpy.uint64)
+
+#Most entries of a board batch's win/tie/loss matrices held at once, and
+#most boards in a batch
+BATCH_ENTRIES = 2000000
+BATCH_BOARDS = 1000
+
+#Fewest sampled boards before the standard error is trusted
+MIN_SAMPLED_BOARDS = 100
+
+#========================================
+#	FUNCTIONS
+#========================================
+
+#---------------------------------------------------------------------------
+#	parseRange(text)
+#
+#	Turns a range in shorthand into an array of 1326 weights (a list if
+#	there's no NumPy). Parts are separated by commas or spaces and can be
+#
+#		AKs, AKo, AK		suited, offsuit or both, QQ a pair
+#		TT+, ATs+		and every better pair, or every better kicker
+#		22-55, KTo-K7o, 76s-54s	everything between, either the kicker
+#					or both cards going down together
+#		AhKh			one particular pocket
+#
+#	and may end with ":weight" (1 if not given). Raises a ValueError for
+#	anything else
+#---------------------------------------------------------------------------
+def parseRange(text):
+
+	if numpy != None:
+		weights = numpy.zeros(len(COMBOS))
+	else:
+		weights = [0.0] * len(COMBOS)
+
+	for part in re.split(r"[,;\s]+", text.strip()):
+		if not part:
+			continue
+
+		weight = 1.0
+		if ":" in part:
+			part, weight = part.split(":", 1)
+			weight = float(weight)
+
+		for i in partCombos(part):
+			weights[i] = weight
+
+	return weights
+
+#---------------------------------------------------------------------------
+#	partCombos(part)
+#
+#	The COMBOS indices of one part of a range, see parseRange()
+#---------------------------------------------------------------------------
+def partCombos(part):
+
+	#One particular pocket
+	if len(part) == 4 and part[1] in "hdscHDSC" and part[3] in "hdscHDSC":
+		ids = card.parseCards(part)
+		if ids[0] == ids[1]:
+			raise ValueError("Not a pocket: '" + part + "'")
+		return [COMBO_INDEX[tuple(sorted(ids))]]
+
+	if "-" in part:
+		first, last = [parseClass(x, part) for x in part.split("-", 1)]
+		if first[2] != last[2]:
+			raise ValueError("Not a range of the same kind of hands: '" + part + "'")
+
+		#Pairs, the same high card with a range of kickers, or both going down together
+		if first[0] == first[1] and last[0] == last[1]:
+			classes = [(r, r) for r in range(min(first[0], last[0]), max(first[0], last[0]) + 1)]
+		elif first[0] == last[0] and first[1] != first[0] and last[1] != last[0]:
+			classes = [(first[0], r) for r in range(min(first[1], last[1]), max(first[1], last[1]) + 1)]
+		elif first[0] - first[1] == last[0] - last[1] and first[0] != first[1]:
+			gap = first[0] - first[1]
+			classes = [(r, r - gap) for r in range(min(first[0], last[0]), max(first[0], last[0]) + 1)]
+		else:
+			raise ValueError("Not a range in range notation: '" + part + "'")
+		kind = first[2]
+
+	elif part.endswith("+"):
+		high, low, kind = parseClass(part[:-1], part)
+		if high == low:
+			classes = [(r, r) for r in range(high, 15)]
+		else:
+			classes = [(high, r) for r in range(low, high)]
+
+	else:
+		high, low, kind = parseClass(part, part)
+		classes = [(high, low)]
+
+	combos = []
+	for high, low in classes:
+		if high == low:
+			combos += PAIR_COMBOS[high]
+		else:
+			if kind != "o":
+				combos += SUITED_COMBOS[(high, low)]
+			if kind != "s":
+				combos += OFFSUIT_COMBOS[(high, low)]
+
+	return combos
+
+#---------------------------------------------------------------------------
+#	parseClass(text, part)
+#
+#	Turns "AKs", "KQo", "T9" or "77" into (high rank, low rank, "s", "o" or
+#	""). part is what to complain about if it isn't one
+#---------------------------------------------------------------------------
+def parseClass(text, part):
+
+	text = text.upper()
+
+	if not (len(text) == 2 or (len(text) == 3 and text[2] in "SO")) or \
+	   not text[0] in card.RANK_CHARACTERS or not text[1] in card.RANK_CHARACTERS:
+		raise ValueError("Not a hand in range notation: '" + part + "'")
+
+	ranks = sorted([card.RANK_CHARACTERS.index(x) + 2 for x in text[:2]], reverse = True)
+	kind = text[2:].lower()
+
+	if ranks[0] == ranks[1] and kind:
+		raise ValueError("A pair can't be suited or offsuit: '" + part + "'")
+
+	return ranks[0], ranks[1], kind
+
+#---------------------------------------------------------------------------
+#	rangeEquity - Works out the equity of the first range against the second
+#	(the share of the pot it wins on average, ties counting half), with the
+#	community cards c fixed. Ranges can be weight arrays or shorthand for
+#	parseRange(), so a single pocket can be given as e.g. "AhKh".
+#
+#	Each pair of pockets (one from each range) counts in proportion to the
+#	product of their weights, and pockets that share a card with each other
+#	or the board are left out.
+#
+#	Each board is scored for every pocket in both ranges at once, and all
+#	the pairs compared. If there are at most exactLimit boards, every one is
+#	dealt and the standard error is 0. Otherwise boards are dealt at random,
+#	the same way as calculate.estimatePockets() does, until the standard
+#	error is down to precision, timeLimit seconds have gone by or maxSamples
+#	boards have been dealt.
+#
+#	Returns (equity, standard error). Needs NumPy
+#---------------------------------------------------------------------------
+def rangeEquity(rangeOne, rangeTwo, c = [], exactLimit = 5000, precision = 0.005, timeLimit = None,
+				maxSamples = None, seed = None):
+
+	assert numpy != None, "rangeEquity() requires NumPy"
+
+	startTime = time.time()
+
+	if isinstance(rangeOne, basestring):
+		rangeOne = parseRange(rangeOne)
+	if isinstance(rangeTwo, basestring):
+		rangeTwo = parseRange(rangeTwo)
+
+	#Only the pockets that are in each range and don't clash with the board
+	boardMask = numpy.uint64(0)
+	for x in c:
+		boardMask |= numpy.uint64(1 << x.id)
+	activeOne = numpy.nonzero((numpy.asarray(rangeOne) > 0) & ((COMBO_MASKS & boardMask) == 0))[0]
+	activeTwo = numpy.nonzero((numpy.asarray(rangeTwo) > 0) & ((COMBO_MASKS & boardMask) == 0))[0]
+
+	#Weights of every pair of pockets that can be dealt together
+	pairWeights = numpy.asarray(rangeOne, dtype = float)[activeOne][:, numpy.newaxis] * \
+				  numpy.asarray(rangeTwo, dtype = float)[activeTwo][numpy.newaxis, :] * \
+				  ((COMBO_MASKS[activeOne][:, numpy.newaxis] & COMBO_MASKS[activeTwo][numpy.newaxis, :]) == 0)
+
+	assert pairWeights.sum() > 0, "No pockets in the ranges can be dealt together"
+
+	remaining = deck.remainingCards(c)
+	numDrawn = 5 - len(c)
+	fixed = numpy.array([x.id for x in c], dtype = numpy.uint8)
+	batchSize = max(1, min(BATCH_BOARDS, BATCH_ENTRIES / pairWeights.size))
+
+	#Running sums of each board's share of the pot and total weight, and of
+	#their squares and product for the standard error
+	sums = numpy.zeros(5)
+
+	if calculate.choose(len(remaining), numDrawn) <= exactLimit:
+		remainingIDs = numpy.array([x.id for x in remaining], dtype = numpy.uint8)
+		combos = calculate.combinationIndices(len(remaining), numDrawn)
+		for start in range(0, len(combos), batchSize):
+			sums += tallyBoards(activeOne, activeTwo, pairWeights, fixed, remainingIDs[combos[start:start + batchSize]])
+
+		return (sums[0] / sums[1], 0.0)
+
+	assert precision > 0 or timeLimit != None or maxSamples != None
+
+	rng = streams.RNGStreams(seed).numpyStream("rangeEquity")
+
+	numBoards = 0
+	while True:
+
+		sums += tallyBoards(activeOne, activeTwo, pairWeights, fixed, deck.shuffledDecks(batchSize, numDrawn, c, rng))
+		numBoards += batchSize
+
+		#Standard error of the ratio of the sums of each board's share and weight
+		equity = sums[0] / sums[1]
+		standardError = sqrt(max(sums[2] - 2 * equity * sums[4] + equity * equity * sums[3], 0.0)) / sums[1]
+
+		if standardError <= precision and numBoards >= MIN_SAMPLED_BOARDS:
+			break
+		if timeLimit != None and time.time() - startTime >= timeLimit:
+			break
+		if maxSamples != None and numBoards >= maxSamples:
+			break
+
+	return (equity, standardError)
+
+#---------------------------------------------------------------------------
+#	tallyBoards(activeOne, activeTwo, pairWeights, fixed, boards)
+#
+#	For the rows of card ids in boards (dealt to the fixed community cards)
+#	adds up the weighted pot share of the first range's pockets, and the
+#	total weight, of every pair of pockets on each board. Returns the sums
+#	of those, their squares and their product, as an array
+#---------------------------------------------------------------------------
+def tallyBoards(activeOne, activeTwo, pairWeights, fixed, boards):
+
+	fullBoards = numpy.hstack([numpy.tile(fixed, (len(boards), 1)), boards])
+	boardMasks = numpy.bitwise_or.reduce(numpy.uint64(1) << fullBoards.astype(numpy.uint64), axis = 1)
+
+	scores = []
+	for active in [activeOne, activeTwo]:
+		#Only score the pockets that aren't on the board
+		live = (COMBO_MASKS[active][numpy.newaxis, :] & boardMasks[:, numpy.newaxis]) == 0
+		boardRows, pocketRows = numpy.nonzero(live)
+
+		activeScores = numpy.full(live.shape, -1, dtype = numpy.int64)
+		if len(boardRows):
+			activeScores[boardRows, pocketRows] = hand.scoreBatch(numpy.hstack([COMBO_ARRAY[active][pocketRows], fullBoards[boardRows]]))
+		scores.append((activeScores, live))
+
+	(scoresOne, liveOne), (scoresTwo, liveTwo) = scores
+
+	weights = pairWeights[numpy.newaxis, :, :] * liveOne[:, :, numpy.newaxis] * liveTwo[:, numpy.newaxis, :]
+	shares = (numpy.sign(scoresOne[:, :, numpy.newaxis] - scoresTwo[:, numpy.newaxis, :]) + 1) / 2.0
+
+	won = (weights * shares).sum(axis = (1, 2))
+	total = weights.sum(axis = (1, 2))
+
+	return numpy.array([won.sum(), total.sum(), (won * won).sum(), (total * total).sum(), (won * total).sum()])
+
+
+#========================================
+#	TESTS
+#========================================
+
+if __name__ == '__main__':
+
+	print "Testing parseRange."
+
+	def numCombos(text):
+		return int(sum(parseRange(text)))
+
+	assert len(COMBOS) == 1326
+	assert numCombos("AA") == 6 and numCombos("AKs") == 4 and numCombos("AKo") == 12 and numCombos("AK") == 16
+	assert numCombos("TT+") == 30
+	assert numCombos("A2s+") == 48
+	assert numCombos("22-44") == numCombos("44-22") == 18
+	assert numCombos("KTo-K7o") == 48
+	assert numCombos("76s-54s") == 12
+	assert numCombos("TT+, AKs, KQo, 76s-54s") == 30 + 4 + 12 + 12
+	assert numCombos("AhKh") == 1 and numCombos("KhAh") == 1
+	assert numCombos("KA") == numCombos("AK")
+
+	#Later parts win, and can have weights
+	weights = parseRange("AKs:0.5, AhKh")
+	assert sum(weights) == 2.5
+	assert weights[COMBO_INDEX[tuple(sorted(card.parseCards("AhKh")))]] == 1.0
+
+	for bad in ["AKx", "AAs", "AK-QT", "AKs-QJo", "A", "AhAh", "1h2h", "AK:x", "T9s-Q8s"]:
+		try:
+			parseRange(bad)
+			assert False, bad
+		except ValueError:
+			pass
+
+	print "Test complete."
+
+	if numpy != None:
+
+		print "Testing rangeEquity."
+
+		board = [card.fromID(i) for i in card.parseCards("2h5h9c")]
+
+		#A single pocket against another is just comparePockets()
+		assert rangeEquity("AhKh", "7c7d", board) == (545 / 990.0, 0.0)
+
+		#A pocket against a range is the average over the pockets it can be against
+		hero = [card.fromID(i) for i in card.parseCards("AhKh")]
+		total = 0.0
+		numVillains = 0
+		for i in numpy.nonzero(parseRange("QQ+, 8c7c"))[0]:
+			villain = [card.fromID(x) for x in COMBOS[i]]
+			if set(villain) & set(hero + board):
+				continue
+			wins, ties, losses = calculate.comparePocketsFast(hero, villain, board)
+			total += (wins + ties / 2.0) / (wins + ties + losses)
+			numVillains += 1
+		assert numVillains == 6 + 3 + 3 + 1
+		equity, standardError = rangeEquity("AhKh", "QQ+, 8c7c", board)
+		assert abs(equity - total / numVillains) < 1e-12
+
+		#Both ranges' equities make up the whole pot
+		one = rangeEquity("TT+, AKs, KQo", "76s-54s, A2s+", board)[0]
+		two = rangeEquity("76s-54s, A2s+", "TT+, AKs, KQo", board)[0]
+		assert abs(one + two - 1) < 1e-12
+
+		#Preflop is sampled
+		equity, standardError = rangeEquity("AhAd", "KcKs", precision = 0.005, seed = 1)
+		assert 0 < standardError <= 0.005
+		assert abs(equity - (1388072 + 6538 / 2.0) / 1712304) < 5 * standardError
+		assert rangeEquity("AhAd", "KcKs", precision = 0.005, seed = 1) == (equity, standardError)
+
+		equity, standardError = rangeEquity("QQ+, AKs", "22+, A2s+, KTo+", timeLimit = 0.5, precision = 0.01, seed = 2)
+		assert 0.5 < equity < 0.8 and standardError <= 0.01
+
+		print "Test complete."
@@ -0,0 +1,164 @@
+#---------------------------------------------------------------------------
+#	streams.py
+#
+#	Description:
+#
+#	Independent, reproducible random number streams. A single master seed
+#	is expanded into as many separate generators as needed (one per table,
+#	per worker process, per deck, per AI...) by hashing the seed together
+#	with a path naming what the stream is for. The same seed and path always
+#	give the same stream, and different paths give unrelated streams, so
+#	simulations can be spread over many processes and any one of them can
+#	still be replayed exactly.
+#
+#---------------------------------------------------------------------------
+
+import random, hashlib
+
+#NumPy is optional, it's only needed for numpyStream()
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+#---------------------------------------------------------------------------
+#	RNGStreams class
+#
+#	Hands out random.Random (or numpy RandomState) generators derived from
+#	a master seed and a path, e.g.
+#
+#		streams = RNGStreams(1234)
+#		table = streams.worker(3).table(7)
+#		deckRNG = table.stream("deck", handNumber)
+#---------------------------------------------------------------------------
+class RNGStreams(object):
+
+	#---------------------------------------------------------------------------
+	#	Constructor
+	#
+	#	Takes a master seed (an int or string). Without one a fresh seed is
+	#	taken from the operating system, and kept in self.seed so the run can
+	#	be repeated later. path is only used by child()
+	#---------------------------------------------------------------------------
+	def __init__(self, seed=None, path=()):
+
+		if seed == None:
+			seed = random.SystemRandom().getrandbits(64)
+
+		self.seed = seed
+		self.path = tuple(path)
+
+	#---------------------------------------------------------------------------
+	#	child(*path)
+	#
+	#	Returns a new set of streams below this one, for handing a whole
+	#	branch (say a worker process) its own independent generators
+	#---------------------------------------------------------------------------
+	def child(self, *path):
+		return RNGStreams(self.seed, self.path + path)
+
+	#---------------------------------------------------------------------------
+	#	worker(workerID), table(tableID)
+	#
+	#	Shorthands for the two usual branches
+	#---------------------------------------------------------------------------
+	def worker(self, workerID):
+		return self.child("worker", workerID)
+
+	def table(self, tableID):
+		return self.child("table", tableID)
+
+	#---------------------------------------------------------------------------
+	#	stream(*path)
+	#
+	#	Returns a random.Random generator for the given path
+	#---------------------------------------------------------------------------
+	def stream(self, *path):
+		return random.Random(long(self.digest(path), 16))
+
+	#---------------------------------------------------------------------------
+	#	numpyStream(*path)
+	#
+	#	Returns a numpy.random.RandomState for the given path (for use with
+	#	deck.shuffledDecks() and other vectorized code)
+	#---------------------------------------------------------------------------
+	def numpyStream(self, *path):
+
+		assert numpy != None, "numpyStream() requires NumPy"
+
+		digest = self.digest(path)
+		words = [int(digest[i:i+8], 16) for i in range(0, len(digest), 8)]
+		return numpy.random.RandomState(words)
+
+	#---------------------------------------------------------------------------
+	#	digest(path)
+	#
+	#	Hashes the master seed and the full path into a 256-bit hex string.
+	#	Integers are written out the same whether they're ints or longs, so a
+	#	seed that's been printed and typed back in gives the same streams
+	#---------------------------------------------------------------------------
+	def digest(self, path):
+		return hashlib.sha256("\0".join([encodeKey(x) for x in (self.seed,) + self.path + tuple(path)])).hexdigest()
+
+#---------------------------------------------------------------------------
+#	encodeKey(x)
+#
+#	Writes a seed or path element as a string for hashing, keeping numbers
+#	and strings apart ("i5" for 5 or 5L, "s5" for "5")
+#---------------------------------------------------------------------------
+def encodeKey(x):
+	
+	if isinstance(x, (int, long)):
+		return "i%d" % x
+	elif isinstance(x, basestring):
+		return "s" + x
+	
+	return "r" + repr(x)
+
+
+#========================================
+#	TESTS
+#========================================
+
+if __name__ == '__main__':
+
+	print "Testing streams."
+
+	streams = RNGStreams(42)
+	a = [streams.stream("deck").random() for i in range(3)]
+	assert a[0] == a[1] == a[2]
+
+	a = streams.stream("deck")
+	b = RNGStreams(42).stream("deck")
+	assert [a.random() for i in range(100)] == [b.random() for i in range(100)]
+
+	#Different paths, seeds and branches must all give different streams
+	first = set()
+	for s in [streams.stream("deck"), streams.stream("deck", 1), streams.stream("player", 1),
+			  RNGStreams(43).stream("deck"), streams.worker(1).stream("deck"),
+			  streams.worker(2).stream("deck"), streams.worker(1).table(1).stream("deck"),
+			  streams.table(1).stream("deck")]:
+		first.add(s.random())
+	assert len(first) == 8
+
+	assert streams.worker(3).table(7).stream("x").random() == RNGStreams(42).child("worker", 3, "table", 7).stream("x").random()
+
+	assert RNGStreams().seed != RNGStreams().seed
+	
+	#A printed seed typed back in has to replay the same streams, int or long
+	fresh = RNGStreams()
+	seed = fresh.seed % 2**63
+	a = RNGStreams(long(seed)).stream("deck")
+	b = RNGStreams(int(str(seed))).stream("deck")
+	assert type(int(str(seed))) == int
+	assert [a.random() for i in range(10)] == [b.random() for i in range(10)]
+	assert RNGStreams(fresh.seed).stream("deck").random() == RNGStreams(int(str(fresh.seed))).stream("deck").random()
+	assert RNGStreams(5).stream(1).random() == RNGStreams(5L).stream(1L).random() != RNGStreams(5).stream("1").random()
+
+	if numpy != None:
+		a = streams.numpyStream("batch").random_sample(10)
+		b = RNGStreams(42).numpyStream("batch").random_sample(10)
+		assert (a == b).all()
+		assert not (a == streams.numpyStream("batch", 2).random_sample(10)).any()
+
+	print "Test complete."
@@ -0,0 +1,200 @@
+#---------------------------------------------------------------------------
+#	tables.py
+#
+#	Description:
+#
+#	Storage for precomputed lookup tables (hand ranks, equities...). A table
+#	is built once, written to a binary file in TABLE_DIRECTORY and from then
+#	on memory-mapped instead of being rebuilt, so starting a new process is
+#	quick and every process reading the same file shares one copy of it in
+#	the operating system's page cache. Sections are handed out as ctypes
+#	arrays viewing the mapped file, so they're never copied into the
+#	process: indexing them gives plain ints, and numpy.frombuffer() turns
+#	them into NumPy arrays on the same memory.
+#
+#	A table file holds one or more named sections of 32-bit integers, stored
+#	in the machine's native byte order (the files are a local cache, not
+#	something to copy between machines):
+#
+#		header		"SPTABLE\0", version, number of sections
+#		per section	name (16 bytes), number of values
+#		data		each section's values in turn
+#
+#---------------------------------------------------------------------------
+
+import os, mmap, struct, array, ctypes
+
+#Where table files are kept, can be changed before the first table is loaded
+TABLE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables")
+
+MAGIC = "SPTABLE\0"
+HEADER = struct.Struct("=8sII")
+SECTION_HEADER = struct.Struct("=16sI")
+ITEM_SIZE = array.array("i").itemsize
+
+#Files mapped so far, kept open for as long as their sections are in use
+mappedFiles = {}
+
+#---------------------------------------------------------------------------
+#	tablePath(name)
+#
+#	Returns the file a table is stored in
+#---------------------------------------------------------------------------
+def tablePath(name):
+	return os.path.join(TABLE_DIRECTORY, name + ".bin")
+
+#---------------------------------------------------------------------------
+#	loadTable(name, build, version = 1)
+#
+#	Returns a dict of section name -> values for the named table. If there's
+#	no file for it yet (or it's from an older version), build() is called to
+#	make one: it must return a list of (section name, list of ints) pairs.
+#	Raise version whenever build() changes so old files get replaced.
+#
+#	If the file can't be written, the freshly built values are returned
+#	anyway (as array.array copies), they just won't be shared with other
+#	processes
+#---------------------------------------------------------------------------
+def loadTable(name, build, version = 1):
+
+	path = tablePath(name)
+
+	sections = readTable(path, version)
+	if sections == None:
+		built = build()
+		try:
+			writeTable(path, version, built)
+		except (IOError, OSError):
+			return dict([(sectionName, array.array("i", values)) for sectionName, values in built])
+
+		sections = readTable(path, version)
+		assert sections != None
+
+	return sections
+
+#---------------------------------------------------------------------------
+#	writeTable(path, version, sections)
+#
+#	Writes the sections to a new file. Many processes may try this at once,
+#	so it's written under a temporary name and renamed into place, which
+#	means readers only ever see a complete file
+#---------------------------------------------------------------------------
+def writeTable(path, version, sections):
+
+	directory = os.path.dirname(path)
+	if not os.path.isdir(directory):
+		try:
+			os.makedirs(directory)
+		except OSError:
+			#Someone else made it first
+			if not os.path.isdir(directory):
+				raise
+
+	tempPath = path + "." + str(os.getpid()) + ".tmp"
+	f = open(tempPath, "wb")
+	try:
+		f.write(HEADER.pack(MAGIC, version, len(sections)))
+		for sectionName, values in sections:
+			assert len(sectionName) <= 16
+			f.write(SECTION_HEADER.pack(sectionName, len(values)))
+		for sectionName, values in sections:
+			array.array("i", values).tofile(f)
+	finally:
+		f.close()
+
+	os.rename(tempPath, path)
+
+#---------------------------------------------------------------------------
+#	readTable(path, version)
+#
+#	Maps the file and returns its sections, or None if it's missing, from
+#	another version or cut short. The mapping is copy-on-write so ctypes can
+#	view it, but nothing ever writes to it, so its pages stay shared
+#---------------------------------------------------------------------------
+def readTable(path, version):
+
+	try:
+		f = open(path, "rb")
+	except IOError:
+		return None
+
+	try:
+		size = os.fstat(f.fileno()).st_size
+		if size < HEADER.size:
+			return None
+
+		data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_COPY)
+	finally:
+		f.close()
+
+	magic, fileVersion, numSections = HEADER.unpack_from(data, 0)
+	if magic != MAGIC or fileVersion != version:
+		return None
+
+	offset = HEADER.size
+	layout = []
+	for i in range(numSections):
+		sectionName, count = SECTION_HEADER.unpack_from(data, offset)
+		layout.append((sectionName.rstrip("\0"), count))
+		offset += SECTION_HEADER.size
+
+	if offset + sum([count for sectionName, count in layout]) * ITEM_SIZE != size:
+		return None
+
+	sections = {}
+	for sectionName, count in layout:
+		sections[sectionName] = (ctypes.c_int * count).from_buffer(data, offset)
+		offset += count * ITEM_SIZE
+
+	mappedFiles[path] = data
+	return sections
+
+
+#========================================
+#	TESTS
+#========================================
+
+if __name__ == '__main__':
+
+	import tempfile, shutil
+
+	print "Testing table files."
+
+	TABLE_DIRECTORY = tempfile.mkdtemp()
+	try:
+		builds = []
+		def build():
+			builds.append(1)
+			return [("squares", [i * i for i in range(100)]), ("empty", []), ("negative", [-1, -2**31])]
+
+		sections = loadTable("test", build)
+		assert len(builds) == 1
+		assert list(sections["squares"]) == [i * i for i in range(100)]
+		assert len(sections["empty"]) == 0
+		assert list(sections["negative"]) == [-1, -2**31]
+
+		#Second time it comes from the file
+		sections = loadTable("test", build)
+		assert len(builds) == 1
+		assert sections["squares"][99] == 99 * 99
+		assert type(sections["squares"][99]) == int
+		
+		#Sections view the mapped file, they aren't copies of it
+		assert ctypes.addressof(sections["negative"]) - ctypes.addressof(sections["squares"]) == 100 * ITEM_SIZE
+
+		#A new version or a damaged file gets rebuilt
+		sections = loadTable("test", build, version = 2)
+		assert len(builds) == 2
+
+		f = open(tablePath("test"), "r+b")
+		f.truncate(100)
+		f.close()
+		sections = loadTable("test", build, version = 2)
+		assert len(builds) == 3
+		assert list(sections["squares"]) == [i * i for i in range(100)]
+
+	finally:
+		mappedFiles.clear()
+		shutil.rmtree(TABLE_DIRECTORY)
+
+	print "Test complete."